@@ -0,0 +1,158 @@
+"""
+Compare polls throughput on the WSGI stack (sync views, thread per request)
+and the ASGI stack (async views on one event loop).
+
+Run from the ``djangotutorial`` directory:
+
+    python -m benchmarks.asgi_vs_wsgi --connections 10 100 500 --requests 2000
+
+Each stack runs in its own process on a fresh SQLite file with the same
+seeded request mix (index, detail, results and votes).
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .common import seed_polls, setup_django, summarize
+
+MIX = {"index": 2, "detail": 3, "results": 4, "vote": 1}
+
+
+def build_requests(choices, total, seed):
+    """Return a list of (method, path, data) tuples."""
+    rng = random.Random(seed)
+    question_ids = sorted(choices)
+    kinds = rng.choices(list(MIX), weights=list(MIX.values()), k=total)
+    requests = []
+    for kind in kinds:
+        question_id = rng.choice(question_ids)
+        if kind == "index":
+            requests.append(("get", "/polls/", None))
+        elif kind == "detail":
+            requests.append(("get", f"/polls/{question_id}/", None))
+        elif kind == "results":
+            requests.append(("get", f"/polls/{question_id}/results/", None))
+        else:
+            data = {"choice": rng.choice(choices[question_id])}
+            requests.append(("post", f"/polls/{question_id}/vote/", data))
+    return requests
+
+
+def run_wsgi(requests, connections):
+    from django.test import Client
+
+    local = threading.local()
+    errors = []
+
+    def send(request):
+        if not hasattr(local, "client"):
+            local.client = Client()
+        method, path, data = request
+        start = time.perf_counter()
+        response = getattr(local.client, method)(path, data)
+        latency = time.perf_counter() - start
+        if response.status_code >= 400:
+            errors.append(response.status_code)
+        return latency
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=connections) as pool:
+        latencies = list(pool.map(send, requests))
+    return latencies, time.perf_counter() - start, len(errors)
+
+
+def run_asgi(requests, connections):
+    from django.test import AsyncClient
+
+    errors = []
+
+    async def main():
+        client = AsyncClient()
+        slots = asyncio.Semaphore(connections)
+
+        async def send(request):
+            method, path, data = request
+            async with slots:
+                start = time.perf_counter()
+                response = await getattr(client, method)(path, data)
+                latency = time.perf_counter() - start
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+            return latency
+
+        return await asyncio.gather(*(send(request) for request in requests))
+
+    start = time.perf_counter()
+    latencies = asyncio.run(main())
+    return latencies, time.perf_counter() - start, len(errors)
+
+
+def run_mode(args):
+    db_path = setup_django(POLLS_ASYNC_VIEWS=args.mode == "asgi")
+    try:
+        from polls.models import Choice
+
+        seed_polls(args.questions, args.choices)
+        choices = {}
+        for choice_id, question_id in Choice.objects.values_list("id", "question_id"):
+            choices.setdefault(question_id, []).append(choice_id)
+        runner = run_asgi if args.mode == "asgi" else run_wsgi
+        rows = []
+        for connections in args.connections:
+            requests = build_requests(choices, args.requests, args.seed)
+            latencies, elapsed, errors = runner(requests, connections)
+            rows.append(
+                {
+                    "mode": args.mode,
+                    "connections": connections,
+                    "errors": errors,
+                    **summarize(latencies, elapsed),
+                }
+            )
+        print(json.dumps(rows))
+    finally:
+        os.unlink(db_path)
+
+
+def run_both(args):
+    rows = []
+    for mode in ("wsgi", "asgi"):
+        command = [sys.executable, "-m", "benchmarks.asgi_vs_wsgi", "--mode", mode]
+        command += ["--requests", str(args.requests), "--seed", str(args.seed)]
+        command += ["--questions", str(args.questions), "--choices", str(args.choices)]
+        command += ["--connections", *map(str, args.connections)]
+        output = subprocess.run(command, check=True, capture_output=True, text=True)
+        rows += json.loads(output.stdout.strip().splitlines()[-1])
+    header = f"{'mode':<6}{'conns':>7}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}"
+    print(header)
+    for row in sorted(rows, key=lambda row: (row["connections"], row["mode"])):
+        print(
+            f"{row['mode']:<6}{row['connections']:>7}{row['throughput']:>10}"
+            f"{row['p50_ms']:>10}{row['p99_ms']:>10}{row['errors']:>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--mode", choices=["both", "wsgi", "asgi"], default="both")
+    parser.add_argument("--connections", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--questions", type=int, default=50)
+    parser.add_argument("--choices", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    if args.mode == "both":
+        run_both(args)
+    else:
+        run_mode(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Shared setup for the polls benchmarks.
+
+Benchmarks run against a throwaway SQLite file so they never touch
+``db.sqlite3`` and see the same write locking as a real deployment.
+"""
+import os
+import statistics
+import tempfile
+
+
+def setup_django(db_path=None, sqlite_timeout=30, **overrides):
+    """
+    Configure Django on a migrated database and return its path.
+
+    Without ``db_path`` a fresh temporary file is used; the caller removes
+    it. ``overrides`` are applied to ``django.conf.settings`` before setup.
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mysite.settings")
+    from django.conf import settings
+
+    if db_path is None:
+        fd, db_path = tempfile.mkstemp(prefix="polls-bench-", suffix=".sqlite3")
+        os.close(fd)
+    settings.DATABASES["default"]["NAME"] = db_path
+    # Số giây chờ khóa ghi của SQLite trước khi báo "database is locked".
+    settings.DATABASES["default"].setdefault("OPTIONS", {})["timeout"] = sqlite_timeout
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ["testserver", "localhost", "127.0.0.1"]
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command("migrate", verbosity=0)
+    return db_path
+
+
+def seed_polls(questions, choices_per_question):
+    """Create published questions with zero-vote choices; return question ids."""
+    import datetime
+
+    from django.utils import timezone
+    from polls.models import Choice, Question
+
+    pub_date = timezone.now() - datetime.timedelta(days=1)
+    created = Question.objects.bulk_create(
+        Question(question_text=f"Question {i}", pub_date=pub_date)
+        for i in range(questions)
+    )
+    Choice.objects.bulk_create(
+        Choice(question=question, choice_text=f"Choice {j}")
+        for question in created
+        for j in range(choices_per_question)
+    )
+    return [question.id for question in created]
+
+
+def summarize(latencies, elapsed):
+    """Return throughput and latency percentiles (ms) for one run."""
+    latencies = sorted(latencies)
+    # "inclusive" keeps the percentiles within the measured latencies.
+    cuts = (
+        statistics.quantiles(latencies, n=100, method="inclusive")
+        if len(latencies) > 1
+        else latencies * 99
+    )
+    return {
+        "requests": len(latencies),
+        "seconds": round(elapsed, 3),
+        "throughput": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(cuts[49] * 1000, 2),
+        "p95_ms": round(cuts[94] * 1000, 2),
+        "p99_ms": round(cuts[98] * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
@@ -0,0 +1,246 @@
+"""
+Concurrent voting load test for ``polls.views.vote``.
+
+Seeds questions and choices, lets ``--voters`` concurrent clients cast
+votes (all on one hot choice with ``--hot``), then reports throughput,
+latency percentiles, failed requests and whether the stored counts match
+the votes that were acknowledged. Run from the ``djangotutorial`` directory:
+
+    python -m benchmarks.vote_load --voters 200 --votes 20 --hot
+    python -m benchmarks.vote_load --voters 200 --hot --buffer
+    python -m benchmarks.vote_load --url http://127.0.0.1:8000 --database db.sqlite3
+
+In-process runs use the Django test client on a temporary SQLite file.
+With ``--url`` the votes go to a running server; ``--database`` must point
+at that server's SQLite file so questions can be seeded and counts checked.
+Use ``--save-baseline NAME`` to store a result and ``--compare NAME`` to
+diff a run against it (see ``benchmarks/baselines/vote_load.json``). Each
+baseline keeps the parameters of its run, and a run with different
+parameters is not compared with it.
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import CookieJar
+from pathlib import Path
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import (
+    HTTPCookieProcessor,
+    HTTPRedirectHandler,
+    Request,
+    build_opener,
+)
+
+from .common import seed_polls, setup_django, summarize
+
+BASELINES = Path(__file__).resolve().parent / "baselines" / "vote_load.json"
+COMPARED = ["throughput", "p50_ms", "p95_ms", "p99_ms", "failed", "lost"]
+
+
+class _NoRedirect(HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+def in_process_voter():
+    from django.test import Client
+
+    # Lỗi "database is locked" được tính là phiếu thất bại (HTTP 500).
+    client = Client(raise_request_exception=False)
+
+    def vote(question_id, choice_id):
+        response = client.post(f"/polls/{question_id}/vote/", {"choice": choice_id})
+        return response.status_code == 302
+
+    return vote
+
+
+def http_voter(base_url):
+    cookies = CookieJar()
+    opener = build_opener(HTTPCookieProcessor(cookies), _NoRedirect)
+
+    def csrf_token(question_id):
+        for cookie in cookies:
+            if cookie.name == "csrftoken":
+                return cookie.value
+        opener.open(f"{base_url}/polls/{question_id}/").read()
+        return csrf_token(question_id)
+
+    def vote(question_id, choice_id):
+        token = csrf_token(question_id)
+        body = urlencode({"choice": choice_id, "csrfmiddlewaretoken": token}).encode()
+        url = f"{base_url}/polls/{question_id}/vote/"
+        request = Request(url, data=body, headers={"X-CSRFToken": token})
+        try:
+            opener.open(request).read()
+        except HTTPError as error:
+            return error.code == 302
+        except URLError:
+            return False
+        return False
+
+    return vote
+
+
+def run(args, targets, make_voter):
+    """Cast the votes and return (latencies, elapsed, acknowledged Counter)."""
+    local = threading.local()
+    acknowledged = Counter()
+    lock = threading.Lock()
+
+    def cast(rng_seed):
+        if not hasattr(local, "vote"):
+            local.vote = make_voter()
+        rng = random.Random(rng_seed)
+        latencies = []
+        for _ in range(args.votes):
+            question_id, choice_id = targets[0] if args.hot else rng.choice(targets)
+            start = time.perf_counter()
+            ok = local.vote(question_id, choice_id)
+            latencies.append(time.perf_counter() - start)
+            if ok:
+                with lock:
+                    acknowledged[choice_id] += 1
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.voters) as pool:
+        seeds = [args.seed * 100_000 + voter for voter in range(args.voters)]
+        latencies = [latency for batch in pool.map(cast, seeds) for latency in batch]
+    return latencies, time.perf_counter() - start, acknowledged
+
+
+def check_counts(acknowledged, choice_ids):
+    """Return (lost, extra) comparing acknowledged votes with stored counts."""
+    from polls.models import Choice
+
+    stored = dict(Choice.objects.filter(pk__in=choice_ids).values_list("id", "votes"))
+    lost = sum(max(0, acknowledged[pk] - stored.get(pk, 0)) for pk in choice_ids)
+    extra = sum(max(0, stored.get(pk, 0) - acknowledged[pk]) for pk in choice_ids)
+    return lost, extra
+
+
+def scenario_name(args):
+    target = "http" if args.url else "inproc"
+    mode = "buffer" if args.buffer else "direct"
+    spread = "hot" if args.hot else "spread"
+    return f"{target}-{mode}-{spread}-{args.voters}x{args.votes}"
+
+
+def scenario_params(args):
+    """The parameters that must match for two runs to be comparable."""
+    return {
+        "target": "http" if args.url else "inproc",
+        "buffer": args.buffer,
+        "max_pending": args.max_pending if args.buffer else None,
+        "hot": args.hot,
+        "voters": args.voters,
+        "votes": args.votes,
+        "questions": args.questions,
+        "choices": args.choices,
+        "sqlite_timeout": args.sqlite_timeout,
+    }
+
+
+def compare(result, name):
+    baselines = json.loads(BASELINES.read_text()) if BASELINES.exists() else {}
+    if name not in baselines:
+        print(f"No baseline named {name!r} in {BASELINES}.")
+        return
+    expected = baselines[name].get("params")
+    if expected != result["params"]:
+        differences = sorted(
+            key
+            for key in {*(expected or {}), *result["params"]}
+            if (expected or {}).get(key) != result["params"].get(key)
+        )
+        raise SystemExit(
+            f"Baseline {name!r} was run with different parameters "
+            f"({', '.join(differences)}); not comparing."
+        )
+    print(f"\nCompared with baseline {name!r}:")
+    for metric in COMPARED:
+        before, now = baselines[name][metric], result[metric]
+        change = f"{(now - before) / before * 100:+.1f}%" if before else "n/a"
+        print(f"  {metric:<11}{before:>12}{now:>12}{change:>10}")
+
+
+def save_baseline(result, name):
+    baselines = json.loads(BASELINES.read_text()) if BASELINES.exists() else {}
+    baselines[name] = result
+    BASELINES.write_text(json.dumps(baselines, indent=2, sort_keys=True) + "\n")
+    print(f"Saved baseline {name!r} to {BASELINES}.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--choices", type=int, default=4)
+    parser.add_argument("--voters", type=int, default=100)
+    parser.add_argument("--votes", type=int, default=10, help="votes per voter")
+    parser.add_argument("--hot", action="store_true", help="all votes on one choice")
+    parser.add_argument("--buffer", action="store_true", help="enable POLLS_VOTE_BUFFER")
+    parser.add_argument("--max-pending", type=int, default=100)
+    parser.add_argument("--sqlite-timeout", type=float, default=5)
+    parser.add_argument("--url", help="base URL of a running server")
+    parser.add_argument("--database", help="SQLite file used by the --url server")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME")
+    args = parser.parse_args()
+    if args.url and not args.database:
+        parser.error("--url needs --database to seed and verify counts")
+
+    buffer = {
+        "ENABLED": args.buffer,
+        "MAX_PENDING": args.max_pending,
+        "FLUSH_INTERVAL": 1.0,
+    }
+    db_path = setup_django(args.database, args.sqlite_timeout, POLLS_VOTE_BUFFER=buffer)
+    try:
+        from polls.models import Choice
+        from polls.vote_buffer import vote_buffer
+
+        question_ids = seed_polls(args.questions, args.choices)
+        targets = list(
+            Choice.objects.filter(question_id__in=question_ids)
+            .order_by("id")
+            .values_list("question_id", "id")
+        )
+        if args.url:
+            base_url = args.url.rstrip("/")
+            make_voter = lambda: http_voter(base_url)  # noqa: E731
+        else:
+            make_voter = in_process_voter
+        latencies, elapsed, acknowledged = run(args, targets, make_voter)
+        # Phiếu còn trong buffer của process này (không áp dụng cho --url).
+        vote_buffer.flush()
+        lost, extra = check_counts(acknowledged, [choice_id for _, choice_id in targets])
+    finally:
+        if not args.database:
+            os.unlink(db_path)
+
+    result = {
+        "scenario": scenario_name(args),
+        "params": scenario_params(args),
+        "acknowledged": sum(acknowledged.values()),
+        "failed": len(latencies) - sum(acknowledged.values()),
+        "lost": lost,
+        "extra": extra,
+        **summarize(latencies, elapsed),
+    }
+    print(json.dumps(result, indent=2))
+    if args.compare:
+        compare(result, args.compare)
+    if args.save_baseline:
+        save_baseline(result, args.save_baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -126,3 +126,38 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/dev/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Polls vote write-behind buffer (see polls/vote_buffer.py)
+POLLS_VOTE_BUFFER = {
+    "ENABLED": False,
+    "MAX_PENDING": 100,
+    "FLUSH_INTERVAL": 2.0,
+}
+
+# Seconds cached polls data (results, latest questions) stays valid
+POLLS_CACHE_TIMEOUT = 300
+
+# Number of questions listed on the polls index page
+POLLS_LATEST_QUESTIONS = 5
+
+# Route polls to the async views (polls/async_views.py) when served over ASGI
+POLLS_ASYNC_VIEWS = False
+
+# Largest number of (question, choice, count) items accepted per batch upload
+POLLS_BATCH_VOTE_MAX_ITEMS = 1000
+
+# Largest number of votes one batch upload may add to a single choice
+POLLS_BATCH_VOTE_MAX_COUNT = 1000
+
+# Bearer tokens accepted by the batch upload, one per kiosk; none by default
+POLLS_BATCH_VOTE_TOKENS = []
+
+# Raise QueryBudgetExceeded when a polls view runs more SQL than it declares
+POLLS_ENFORCE_QUERY_BUDGETS = DEBUG
+
+# Question changelist for very large tables: estimated counts, keyset paging,
+# prefix search (see polls/admin.py)
+POLLS_ADMIN_LARGE_TABLE = False
+
+# Seconds a vote event must age before rollup_votes folds it into the buckets
+POLLS_ROLLUP_LAG = 5
@@ -1,6 +1,131 @@
+import base64
+import datetime
+
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import BooleanField, ExpressionWrapper, Max, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
 from .models import Question, Choice
 
+CURSOR_VAR = "after"
+
+
+def large_table_mode():
+    return getattr(settings, "POLLS_ADMIN_LARGE_TABLE", False)
+
+
+def estimate_row_count(model):
+    """Return a cheap estimate of the table's row count, or None."""
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE relname = %s", [table]
+            )
+            row = cursor.fetchone()
+            return row[0] if row and row[0] >= 0 else None
+        if connection.vendor == "mysql":
+            cursor.execute(
+                "SELECT table_rows FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name = %s",
+                [table],
+            )
+            row = cursor.fetchone()
+            return row[0] if row else None
+    # SQLite không lưu số dòng; id lớn nhất (cuối B-tree) là ước lượng đủ gần.
+    return model._default_manager.aggregate(max_pk=Max("pk"))["max_pk"] or 0
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that never runs an unbounded COUNT(*).
+
+    Unfiltered lists use the database's row estimate; filtered lists count
+    at most ``count_limit`` rows.
+    """
+
+    count_limit = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_row_count(queryset.model)
+            if estimate is not None:
+                return estimate
+        return queryset.order_by()[: self.count_limit].count()
+
+
+class KeysetChangeList(ChangeList):
+    """
+    Changelist paged with a (pub_date, id) cursor instead of OFFSET.
+
+    The ``after`` query parameter holds the last row of the previous page,
+    so every page is an index range scan no matter how deep it is.
+    """
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_queryset(self, request, exclude_parameters=None):
+        self.cursor = request.GET.get(CURSOR_VAR)
+        # Liên kết lọc/sắp xếp/tìm kiếm luôn quay về trang đầu.
+        self.params.pop(CURSOR_VAR, None)
+        self.filter_params.pop(CURSOR_VAR, None)
+        queryset = super().get_queryset(request, exclude_parameters)
+        if self.cursor:
+            pub_date, pk = self.decode_cursor(self.cursor)
+            queryset = queryset.filter(
+                Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, pk__lt=pk)
+            )
+        return queryset
+
+    @staticmethod
+    def encode_cursor(question):
+        value = f"{question.pub_date.isoformat()}|{question.pk}"
+        return base64.urlsafe_b64encode(value.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            value = base64.urlsafe_b64decode(cursor.encode()).decode()
+            pub_date, pk = value.split("|")
+            pub_date = parse_datetime(pub_date)
+            if pub_date is None:
+                raise ValueError(cursor)
+            return pub_date, int(pk)
+        except ValueError as e:
+            raise IncorrectLookupParameters(e)
+
+    def get_results(self, request):
+        paginator = self.model_admin.get_paginator(
+            request, self.queryset, self.list_per_page
+        )
+        rows = list(self.queryset[: self.list_per_page + 1])
+        self.result_list = rows[: self.list_per_page]
+        self.next_cursor = (
+            self.encode_cursor(self.result_list[-1])
+            if len(rows) > self.list_per_page
+            else None
+        )
+        self.next_page_url = self.get_query_string({CURSOR_VAR: self.next_cursor})
+        self.first_page_url = self.get_query_string(remove=[CURSOR_VAR])
+        self.result_count = paginator.count
+        self.full_result_count = None
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.can_show_all = False
+        self.multi_page = bool(self.cursor or self.next_cursor)
+        self.paginator = paginator
+
 
 class ChoiceInline(admin.TabularInline):
     model = Choice
@@ -17,6 +142,59 @@ class QuestionAdmin(admin.ModelAdmin):
         ),
     ]
     inlines = [ChoiceInline]
-    list_display = ["question_text", "pub_date", "was_published_recently"]
+    list_display = ["question_text", "pub_date", "published_recently"]
     list_filter = ["pub_date"]
     search_fields = ["question_text"]
+
+    def get_queryset(self, request):
+        # Tính cờ "recent" trong SQL để có thể sắp xếp trên database.
+        now = timezone.now()
+        return (
+            super()
+            .get_queryset(request)
+            .annotate(
+                is_recent=ExpressionWrapper(
+                    Q(
+                        pub_date__gte=now - datetime.timedelta(days=1),
+                        pub_date__lte=now,
+                    ),
+                    output_field=BooleanField(),
+                )
+            )
+        )
+
+    @admin.display(
+        boolean=True,
+        ordering="is_recent",
+        description="Published recently?",
+    )
+    def published_recently(self, obj):
+        return obj.is_recent
+
+    # --- Chế độ bảng lớn (POLLS_ADMIN_LARGE_TABLE) ---
+
+    def get_search_fields(self, request):
+        if large_table_mode():
+            # Tìm theo tiền tố dùng được chỉ mục polls_question_text_prefix.
+            return ["^question_text"]
+        return super().get_search_fields(request)
+
+    def get_ordering(self, request):
+        if large_table_mode():
+            return ["-pub_date", "-pk"]
+        return super().get_ordering(request)
+
+    def get_sortable_by(self, request):
+        if large_table_mode():
+            return ()
+        return super().get_sortable_by(request)
+
+    def get_changelist(self, request, **kwargs):
+        if large_table_mode():
+            return KeysetChangeList
+        return super().get_changelist(request, **kwargs)
+
+    def get_paginator(self, request, queryset, per_page, **kwargs):
+        if large_table_mode():
+            return EstimatedCountPaginator(queryset, per_page, **kwargs)
+        return super().get_paginator(request, queryset, per_page, **kwargs)
@@ -0,0 +1,109 @@
+"""
+Time-bucketed vote analytics.
+
+Votes are appended to ``VoteEvent``; ``rollup_vote_events()`` folds new
+events into ``HourlyVoteRollup`` and ``DailyVoteRollup`` (run it
+periodically with ``manage.py rollup_votes``). Time series are always read
+from the rollup tables, never from the raw events.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from .models import (
+    DailyVoteRollup,
+    HourlyVoteRollup,
+    RollupState,
+    VoteEvent,
+)
+
+BUCKETS = {
+    "hour": (TruncHour, HourlyVoteRollup),
+    "day": (TruncDay, DailyVoteRollup),
+}
+
+
+def _merge(rollup_model, rows):
+    """Add {(choice_id, bucket): votes} into existing rollup rows."""
+    existing = {
+        (row.choice_id, row.bucket): row
+        for row in rollup_model.objects.filter(
+            choice_id__in={choice_id for choice_id, _ in rows},
+            bucket__in={bucket for _, bucket in rows},
+        )
+    }
+    updated, created = [], []
+    for key, votes in rows.items():
+        if key in existing:
+            existing[key].votes += votes
+            updated.append(existing[key])
+        else:
+            created.append(rollup_model(choice_id=key[0], bucket=key[1], votes=votes))
+    rollup_model.objects.bulk_update(updated, ["votes"], batch_size=500)
+    rollup_model.objects.bulk_create(created, batch_size=500)
+
+
+def rollup_vote_events(now=None):
+    """
+    Fold VoteEvents not yet rolled up into the bucket tables.
+
+    Events younger than ``POLLS_ROLLUP_LAG`` seconds are left for the next
+    run, so a transaction that is still committing an older id cannot be
+    skipped. Return the number of events processed.
+    """
+    now = now or timezone.now()
+    lag = datetime.timedelta(seconds=getattr(settings, "POLLS_ROLLUP_LAG", 5))
+    with transaction.atomic():
+        state, _ = RollupState.objects.select_for_update().get_or_create(name="votes")
+        events = VoteEvent.objects.filter(pk__gt=state.last_event_id)
+        upper = events.filter(created__lt=now - lag).aggregate(last=Max("pk"))["last"]
+        if upper is None:
+            return 0
+        events = events.filter(pk__lte=upper)
+        processed = events.count()
+        for trunc, rollup_model in BUCKETS.values():
+            rows = (
+                events.annotate(bucket=trunc("created"))
+                .values_list("choice_id", "bucket")
+                .annotate(votes=Sum("count"))
+                .order_by()
+            )
+            _merge(rollup_model, {(c, b): votes for c, b, votes in rows})
+        state.last_event_id = upper
+        state.save(update_fields=["last_event_id"])
+    return processed
+
+
+def prune_vote_events(before):
+    """Delete rolled-up events created before ``before``; return the count."""
+    state = RollupState.objects.filter(name="votes").first()
+    if state is None:
+        return 0
+    deleted, _ = VoteEvent.objects.filter(
+        pk__lte=state.last_event_id, created__lt=before
+    ).delete()
+    return deleted
+
+
+def vote_timeseries(question_id, bucket="hour", since=None, until=None):
+    """
+    Return {choice_id: [(bucket_start, votes), ...]} for a question.
+
+    Only buckets with votes are listed, oldest first.
+    """
+    rollup_model = BUCKETS[bucket][1]
+    rows = rollup_model.objects.filter(choice__question_id=question_id)
+    if since is not None:
+        rows = rows.filter(bucket__gte=since)
+    if until is not None:
+        rows = rows.filter(bucket__lt=until)
+    series = {}
+    for choice_id, start, votes in rows.order_by("choice_id", "bucket").values_list(
+        "choice_id", "bucket", "votes"
+    ):
+        series.setdefault(choice_id, []).append((start, votes))
+    return series
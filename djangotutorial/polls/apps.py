@@ -1,6 +1,15 @@
+import atexit
+
 from django.apps import AppConfig
 
 
 class PollsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'polls'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .vote_buffer import vote_buffer
+
+        # Ghi nốt các phiếu còn trong buffer khi process dừng.
+        atexit.register(vote_buffer.flush)
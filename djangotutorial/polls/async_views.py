@@ -0,0 +1,82 @@
+"""
+Async versions of the polls views for ASGI deployments.
+
+They use the async ORM and cache APIs and are routed instead of
+``polls.views`` when ``POLLS_ASYNC_VIEWS`` is set.
+"""
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import F
+from django.http import HttpResponseRedirect
+from django.shortcuts import aget_object_or_404, render
+from django.urls import reverse
+from django.utils import timezone
+from django.views import View
+from .cache import ainvalidate_results, aget_results, alatest_questions
+from .models import Choice, Question, VoteEvent
+from .views import render_results
+from .vote_buffer import vote_buffer
+
+
+class IndexView(View):
+    async def get(self, request):
+        """Return the last five published questions."""
+        return render(
+            request,
+            "polls/index.html",
+            {"latest_question_list": await alatest_questions()},
+        )
+
+
+class DetailView(View):
+    async def get(self, request, pk):
+        # Lấy sẵn choices để template không truy vấn đồng bộ.
+        question = await aget_object_or_404(
+            Question.objects.prefetch_related("choice_set"),
+            pk=pk,
+            pub_date__lte=timezone.now(),
+        )
+        return render(request, "polls/detail.html", {"question": question})
+
+
+class ResultsView(View):
+    async def get(self, request, pk):
+        return render_results(request, await aget_results(pk))
+
+
+@sync_to_async
+def record_vote(choice):
+    """Count one vote for ``choice`` and log its VoteEvent atomically."""
+    with transaction.atomic():
+        Choice.objects.filter(pk=choice.pk).update(votes=F("votes") + 1)
+        VoteEvent.objects.create(choice=choice)
+
+
+async def vote(request, question_id):
+    """Handle voting for a question's choice."""
+    question = await aget_object_or_404(Question, pk=question_id)
+    try:
+        selected_choice = await question.choice_set.aget(pk=request.POST["choice"])
+    except (KeyError, Choice.DoesNotExist):
+        # Redisplay the question voting form with error
+        question = await Question.objects.prefetch_related("choice_set").aget(
+            pk=question_id
+        )
+        return render(
+            request,
+            "polls/detail.html",
+            {
+                "question": question,
+                "error_message": "Bạn chưa chọn câu trả lời.",
+            },
+        )
+    if vote_buffer.enabled:
+        if vote_buffer.add(selected_choice.id):
+            await sync_to_async(vote_buffer.flush)()
+    else:
+        # Async ORM chưa hỗ trợ transaction nên ghi trong một hàm đồng bộ.
+        await record_vote(selected_choice)
+        # update() không gửi post_save nên tự xóa cache kết quả.
+        await ainvalidate_results(question.id)
+    # Redirect to the results page to prevent double-posting
+    return HttpResponseRedirect(reverse("polls:results", args=(question.id,)))
@@ -0,0 +1,157 @@
+"""
+Cached data for the polls pages.
+
+Results are cached per question as the persisted choice list and looked up
+with buffered votes added on top, so the cache only has to be invalidated
+when rows change (see ``polls.signals`` and ``VoteBuffer.flush``).
+
+The index keeps one cached list of the latest published questions together
+with the publish time of the next future-dated question, after which the
+list is rebuilt so scheduled questions go live on time.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import Choice, Question
+from .vote_buffer import vote_buffer
+
+
+LATEST_QUESTIONS_KEY = "polls:latest"
+
+
+def _latest_querysets(now):
+    count = getattr(settings, "POLLS_LATEST_QUESTIONS", 5)
+    questions = Question.objects.filter(pub_date__lte=now).order_by("-pub_date")[:count]
+    next_pub_date = (
+        Question.objects.filter(pub_date__gt=now)
+        .order_by("pub_date")
+        .values_list("pub_date", flat=True)
+    )
+    return questions, next_pub_date
+
+
+def _is_stale(data, now):
+    return data is None or (data["valid_until"] and data["valid_until"] <= now)
+
+
+def _cache_timeout():
+    return getattr(settings, "POLLS_CACHE_TIMEOUT", 300)
+
+
+def latest_questions():
+    """Return the last ``POLLS_LATEST_QUESTIONS`` published questions."""
+    now = timezone.now()
+    data = cache.get(LATEST_QUESTIONS_KEY)
+    if _is_stale(data, now):
+        questions, next_pub_date = _latest_querysets(now)
+        data = {"questions": list(questions), "valid_until": next_pub_date.first()}
+        cache.set(LATEST_QUESTIONS_KEY, data, _cache_timeout())
+    return data["questions"]
+
+
+async def alatest_questions():
+    """Async version of latest_questions()."""
+    now = timezone.now()
+    data = await cache.aget(LATEST_QUESTIONS_KEY)
+    if _is_stale(data, now):
+        questions, next_pub_date = _latest_querysets(now)
+        data = {
+            "questions": [question async for question in questions],
+            "valid_until": await next_pub_date.afirst(),
+        }
+        await cache.aset(LATEST_QUESTIONS_KEY, data, _cache_timeout())
+    return data["questions"]
+
+
+def invalidate_latest_questions():
+    cache.delete(LATEST_QUESTIONS_KEY)
+
+
+def results_cache_key(question_id):
+    return f"polls:results:{question_id}"
+
+
+def _results_querysets(question_id):
+    question = Question.objects.filter(pk=question_id).values(
+        "id", "question_text", "pub_date"
+    )
+    choices = (
+        Choice.objects.filter(question_id=question_id)
+        .order_by("id")
+        .values("id", "choice_text", "votes")
+    )
+    return question, choices
+
+
+def _with_pending(data):
+    pending = vote_buffer.pending([choice["id"] for choice in data["choices"]])
+    choices = [
+        {**choice, "votes": choice["votes"] + pending.get(choice["id"], 0)}
+        for choice in data["choices"]
+    ]
+    return {
+        "question": data["question"],
+        "choices": choices,
+        "total": sum(choice["votes"] for choice in choices),
+    }
+
+
+def get_results(question_id):
+    """
+    Return {"question", "choices", "total"} for a question, or None.
+
+    Choices are dicts with ``votes`` counting both persisted and buffered
+    votes.
+    """
+    key = results_cache_key(question_id)
+    data = cache.get(key)
+    if data is None:
+        question, choices = _results_querysets(question_id)
+        question = question.first()
+        if question is None:
+            return None
+        data = {"question": question, "choices": list(choices)}
+        cache.set(key, data, _cache_timeout())
+    return _with_pending(data)
+
+
+async def aget_results(question_id):
+    """Async version of get_results()."""
+    key = results_cache_key(question_id)
+    data = await cache.aget(key)
+    if data is None:
+        question, choices = _results_querysets(question_id)
+        question = await question.afirst()
+        if question is None:
+            return None
+        data = {"question": question, "choices": [choice async for choice in choices]}
+        await cache.aset(key, data, _cache_timeout())
+    return _with_pending(data)
+
+
+def results_etag(results):
+    """Return a quoted strong ETag for the rendered results."""
+    parts = [str(results["question"]["id"]), results["question"]["question_text"]]
+    for choice in results["choices"]:
+        parts.append(f'{choice["id"]}:{choice["votes"]}:{choice["choice_text"]}')
+    return '"%s"' % hashlib.md5("\n".join(parts).encode()).hexdigest()
+
+
+def invalidate_results(question_id):
+    cache.delete(results_cache_key(question_id))
+
+
+async def ainvalidate_results(question_id):
+    await cache.adelete(results_cache_key(question_id))
+
+
+def invalidate_results_for_choices(choice_ids):
+    question_ids = (
+        Choice.objects.filter(pk__in=list(choice_ids))
+        .values_list("question_id", flat=True)
+        .distinct()
+    )
+    cache.delete_many([results_cache_key(pk) for pk in question_ids])
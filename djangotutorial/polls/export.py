@@ -0,0 +1,79 @@
+"""
+Streaming export of poll results.
+
+Rows are read with a chunked server-side iterator and encoded a batch of
+lines at a time, so memory use does not grow with the number of polls.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Question
+from .vote_buffer import vote_buffer
+
+EXPORT_FIELDS = [
+    "question_id",
+    "question_text",
+    "pub_date",
+    "choice_id",
+    "choice_text",
+    "votes",
+]
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def export_rows(chunk_size=2000):
+    """Yield one tuple per choice (or per question without choices)."""
+    pending = vote_buffer.pending()
+    rows = (
+        Question.objects.order_by("id", "choice__id")
+        .values_list(
+            "id",
+            "question_text",
+            "pub_date",
+            "choice__id",
+            "choice__choice_text",
+            "choice__votes",
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+    for row in rows:
+        if pending and row[3] in pending:
+            row = row[:5] + (row[5] + pending[row[3]],)
+        yield row
+
+
+class _Echo:
+    """File-like object that returns what is written, for csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+def export_lines(fmt, chunk_size=2000, lines_per_chunk=500):
+    """Yield the export in ``fmt`` as strings of up to ``lines_per_chunk`` lines."""
+    encode = _csv_lines if fmt == "csv" else _ndjson_lines
+    batch = []
+    for line in encode(export_rows(chunk_size)):
+        batch.append(line)
+        if len(batch) >= lines_per_chunk:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
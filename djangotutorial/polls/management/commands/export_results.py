@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from polls.export import FORMATS, export_lines
+
+
+class Command(BaseCommand):
+    help = "Stream poll results (one row per choice) as CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=sorted(FORMATS), default="csv")
+        parser.add_argument("--output", help="File to write to (default: stdout).")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        lines = export_lines(options["format"], chunk_size=options["chunk_size"])
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8", newline="") as output:
+                output.writelines(lines)
+        else:
+            for chunk in lines:
+                self.stdout.write(chunk, ending="")
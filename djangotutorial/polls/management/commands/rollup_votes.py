@@ -0,0 +1,24 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from polls.analytics import prune_vote_events, rollup_vote_events
+
+
+class Command(BaseCommand):
+    help = "Fold new vote events into the hourly and daily rollup tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--prune-days",
+            type=int,
+            help="Also delete rolled-up events older than this many days.",
+        )
+
+    def handle(self, *args, **options):
+        processed = rollup_vote_events()
+        self.stdout.write(f"Rolled up {processed} vote events.")
+        if options["prune_days"] is not None:
+            before = timezone.now() - datetime.timedelta(days=options["prune_days"])
+            self.stdout.write(f"Pruned {prune_vote_events(before)} vote events.")
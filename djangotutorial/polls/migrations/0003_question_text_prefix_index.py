@@ -0,0 +1,42 @@
+from django.db import migrations
+
+INDEX_NAME = "polls_question_text_prefix"
+
+# Chỉ mục cho tìm kiếm theo tiền tố không phân biệt hoa thường (istartswith)
+# mà admin dùng khi bật POLLS_ADMIN_LARGE_TABLE. Mỗi backend viết biểu thức
+# istartswith khác nhau nên chỉ mục cũng khác nhau.
+COLUMNS = {
+    "sqlite": '"question_text" COLLATE NOCASE',
+    "postgresql": 'UPPER("question_text"::text) text_pattern_ops',
+}
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    columns = COLUMNS.get(vendor, schema_editor.quote_name("question_text"))
+    schema_editor.execute(
+        "CREATE INDEX %s ON %s (%s)"
+        % (
+            schema_editor.quote_name(INDEX_NAME),
+            schema_editor.quote_name("polls_question"),
+            columns,
+        )
+    )
+
+
+def drop_index(apps, schema_editor):
+    sql = "DROP INDEX %s" % schema_editor.quote_name(INDEX_NAME)
+    if schema_editor.connection.vendor == "mysql":
+        sql += " ON %s" % schema_editor.quote_name("polls_question")
+    schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0002_question_pub_date_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
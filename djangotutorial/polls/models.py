@@ -2,11 +2,13 @@ from django.contrib import admin
 from django.utils import timezone
 import datetime
 from django.db import models
+from django.db.models import Case, F, IntegerField, Value, When
+from .query_budget import allow_extra_queries
 
 
 class Question(models.Model):
     question_text = models.CharField(max_length=200)
-    pub_date = models.DateTimeField("date published")
+    pub_date = models.DateTimeField("date published", db_index=True)
 
     @admin.display(
         boolean=True,
@@ -21,10 +23,94 @@ class Question(models.Model):
         return self.question_text
 
 
+class ChoiceQuerySet(models.QuerySet):
+    # Giữ số tham số SQL mỗi câu UPDATE dưới giới hạn của SQLite.
+    ADD_VOTES_BATCH_SIZE = 300
+
+    def add_votes(self, increments):
+        """
+        Apply {choice_id: count} increments with batched UPDATE statements.
+
+        Each batch is a single ``UPDATE ... SET votes = votes + CASE ...``
+        so a hot poll costs one write per batch instead of one per vote.
+        One VoteEvent per choice is appended for the analytics rollups.
+        Query budgets count one UPDATE; further batches are allowed for.
+        Return the number of rows updated.
+        """
+        increments = [(pk, count) for pk, count in increments.items() if count]
+        batches = -(-len(increments) // self.ADD_VOTES_BATCH_SIZE)
+        allow_extra_queries(max(batches - 1, 0))
+        updated = 0
+        for start in range(0, len(increments), self.ADD_VOTES_BATCH_SIZE):
+            batch = increments[start:start + self.ADD_VOTES_BATCH_SIZE]
+            delta = Case(
+                *[When(pk=pk, then=Value(count)) for pk, count in batch],
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+            updated += self.filter(pk__in=[pk for pk, _ in batch]).update(
+                votes=F("votes") + delta
+            )
+        VoteEvent.objects.bulk_create(
+            VoteEvent(choice_id=pk, count=count) for pk, count in increments
+        )
+        return updated
+
+
 class Choice(models.Model):
     question = models.ForeignKey(Question, on_delete=models.CASCADE)
     choice_text = models.CharField(max_length=200)
     votes = models.IntegerField(default=0)
 
+    objects = ChoiceQuerySet.as_manager()
+
     def __str__(self):
         return self.choice_text
+
+
+class VoteEvent(models.Model):
+    """Append-only log of votes, folded into rollups by polls.analytics."""
+
+    choice = models.ForeignKey(Choice, on_delete=models.CASCADE)
+    count = models.PositiveIntegerField(default=1)
+    created = models.DateTimeField(default=timezone.now)
+
+
+class VoteRollup(models.Model):
+    choice = models.ForeignKey(Choice, on_delete=models.CASCADE)
+    bucket = models.DateTimeField()
+    votes = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+    def __str__(self):
+        return f"{self.choice_id} @ {self.bucket:%Y-%m-%d %H:%M}: {self.votes}"
+
+
+class HourlyVoteRollup(VoteRollup):
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["choice", "bucket"], name="polls_hourly_rollup_unique"
+            )
+        ]
+
+
+class DailyVoteRollup(VoteRollup):
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["choice", "bucket"], name="polls_daily_rollup_unique"
+            )
+        ]
+
+
+class RollupState(models.Model):
+    """Id of the last VoteEvent already folded into the rollups."""
+
+    name = models.CharField(max_length=50, unique=True)
+    last_event_id = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.last_event_id}"
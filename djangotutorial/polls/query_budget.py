@@ -0,0 +1,68 @@
+"""
+Per-view SQL query budgets.
+
+``@query_budget(n)`` declares that a view runs at most ``n`` queries,
+template rendering included. When ``POLLS_ENFORCE_QUERY_BUDGETS`` is set
+(development and the test suite) a view that goes over its budget raises
+``QueryBudgetExceeded`` listing the queries it ran, so N+1 regressions fail
+before they are deployed.
+
+Work whose size varies by design, such as the batched UPDATEs of
+``ChoiceQuerySet.add_votes``, calls ``allow_extra_queries(n)`` so the
+running view's budget grows by the queries beyond its declared baseline.
+"""
+import contextvars
+import functools
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+_extra_queries = contextvars.ContextVar("polls_extra_queries", default=None)
+
+
+def allow_extra_queries(count):
+    """Raise the budget of the view being checked, if any, by ``count``."""
+    extra = _extra_queries.get()
+    if extra is not None:
+        extra[0] += count
+
+
+def query_budget(max_queries):
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not getattr(settings, "POLLS_ENFORCE_QUERY_BUDGETS", False):
+                return view(request, *args, **kwargs)
+            extra = [0]
+            token = _extra_queries.set(extra)
+            try:
+                with CaptureQueriesContext(connection) as queries:
+                    response = view(request, *args, **kwargs)
+                    # TemplateResponse chỉ render sau khi view trả về.
+                    if hasattr(response, "render") and not response.is_rendered:
+                        response.render()
+            finally:
+                _extra_queries.reset(token)
+            budget = max_queries + extra[0]
+            if len(queries) > budget:
+                raise QueryBudgetExceeded(
+                    "%s ran %d queries, budget is %d:\n%s"
+                    % (
+                        view.__qualname__,
+                        len(queries),
+                        budget,
+                        "\n".join(query["sql"] for query in queries),
+                    )
+                )
+            return response
+
+        wrapper.query_budget = max_queries
+        return wrapper
+
+    return decorator
@@ -1,8 +1,45 @@
 import datetime
-from django.test import TestCase
+import json
+from io import StringIO
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.core.cache import cache
+from django.http import Http404, HttpResponse
+from django.test import (
+    AsyncRequestFactory,
+    RequestFactory,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
 from django.utils import timezone
 from django.urls import reverse
-from .models import Question
+from . import async_views
+from .analytics import prune_vote_events, rollup_vote_events
+from .models import (
+    Choice,
+    ChoiceQuerySet,
+    DailyVoteRollup,
+    HourlyVoteRollup,
+    Question,
+    VoteEvent,
+)
+from .query_budget import QueryBudgetExceeded, allow_extra_queries, query_budget
+from .vote_buffer import vote_buffer
+
+
+@override_settings(POLLS_ENFORCE_QUERY_BUDGETS=True)
+class PollsTestCase(TestCase):
+    """
+    TestCase xóa cache polls trước mỗi test (rollback không gửi signal)
+    và bật kiểm tra query budget cho mọi request của test.
+    """
+
+    def setUp(self):
+        cache.clear()
 
 
 # --- Test cho model Question ---
@@ -45,7 +82,7 @@ def create_question(question_text, days):
 
 
 # --- Test cho IndexView ---
-class QuestionIndexViewTests(TestCase):
+class QuestionIndexViewTests(PollsTestCase):
 
     def test_no_questions(self):
         """
@@ -95,7 +132,7 @@ class QuestionIndexViewTests(TestCase):
 
 
 # --- Test cho DetailView ---
-class QuestionDetailViewTests(TestCase):
+class QuestionDetailViewTests(PollsTestCase):
 
     def test_future_question(self):
         """
@@ -114,3 +151,668 @@ class QuestionDetailViewTests(TestCase):
         url = reverse("polls:detail", args=(past_question.id,))
         response = self.client.get(url)
         self.assertContains(response, past_question.question_text)
+
+
+# --- Test cho vote buffer (ghi phiếu trễ theo lô) ---
+@override_settings(
+    POLLS_VOTE_BUFFER={"ENABLED": True, "MAX_PENDING": 3, "FLUSH_INTERVAL": 3600}
+)
+class VoteBufferTests(PollsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.question = create_question("Buffered question.", days=-1)
+        self.choice = self.question.choice_set.create(choice_text="A")
+
+    def tearDown(self):
+        vote_buffer.flush()
+
+    def vote(self):
+        return self.client.post(
+            reverse("polls:vote", args=(self.question.id,)),
+            {"choice": self.choice.id},
+        )
+
+    def test_vote_is_buffered(self):
+        """
+        Phiếu được giữ trong buffer, chưa ghi xuống Choice.votes.
+        """
+        self.vote()
+        self.choice.refresh_from_db()
+        self.assertEqual(self.choice.votes, 0)
+        self.assertEqual(vote_buffer.pending([self.choice.id]), {self.choice.id: 1})
+
+    def test_size_trigger_flushes_batch(self):
+        """
+        Đủ MAX_PENDING phiếu thì buffer được flush bằng UPDATE theo lô.
+        """
+        for _ in range(3):
+            self.vote()
+        self.choice.refresh_from_db()
+        self.assertEqual(self.choice.votes, 3)
+        self.assertEqual(vote_buffer.pending(), {})
+
+    def test_results_include_buffered_votes(self):
+        """
+        ResultsView cộng cả phiếu đã lưu và phiếu đang trong buffer.
+        """
+        Choice.objects.filter(pk=self.choice.pk).update(votes=5)
+        self.vote()
+        response = self.client.get(reverse("polls:results", args=(self.question.id,)))
+        self.assertContains(response, "A -- 6 votes")
+
+    def test_add_votes_batches_increments(self):
+        """
+        add_votes() cộng đúng số phiếu cho nhiều lựa chọn trong một lần gọi.
+        """
+        other = self.question.choice_set.create(choice_text="B", votes=2)
+        Choice.objects.add_votes({self.choice.id: 4, other.id: 1})
+        self.choice.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.choice.votes, other.votes), (4, 3))
+
+    def test_flush_over_many_choices_fits_budget(self):
+        """
+        Flush qua hơn ADD_VOTES_BATCH_SIZE lựa chọn vẫn nằm trong query budget.
+        """
+        others = Choice.objects.bulk_create(
+            Choice(question=self.question, choice_text=str(i))
+            for i in range(ChoiceQuerySet.ADD_VOTES_BATCH_SIZE)
+        )
+        for choice in others:
+            vote_buffer.add(choice.id)
+        response = self.vote()
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Choice.objects.filter(votes=1).count(), len(others) + 1)
+
+
+@override_settings(
+    POLLS_VOTE_BUFFER={"ENABLED": True, "MAX_PENDING": 100, "FLUSH_INTERVAL": 0.05}
+)
+class VoteBufferTimerTests(TransactionTestCase):
+    """
+    Timer chạy trong thread riêng nên cần dữ liệu đã commit (không dùng TestCase).
+    """
+
+    def tearDown(self):
+        vote_buffer.flush()
+
+    def test_interval_flushes_without_more_votes(self):
+        """
+        Hết FLUSH_INTERVAL thì timer tự flush, không cần phiếu nào tới sau.
+        """
+        question = create_question("Timed question.", days=-1)
+        choice = question.choice_set.create(choice_text="A")
+        vote_buffer.add(choice.id)
+        timer = vote_buffer._timer
+        self.assertTrue(timer.daemon)
+        timer.join(timeout=5)
+        choice.refresh_from_db()
+        self.assertEqual(choice.votes, 1)
+        self.assertEqual(vote_buffer.pending(), {})
+        self.assertIsNone(vote_buffer._timer)
+
+
+# --- Test cho cache kết quả của ResultsView ---
+class ResultsCacheTests(PollsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.question = create_question("Cached question.", days=-1)
+        self.choice = self.question.choice_set.create(choice_text="A")
+        self.url = reverse("polls:results", args=(self.question.id,))
+
+    def test_repeat_view_uses_cache(self):
+        """
+        Lần xem thứ hai lấy kết quả từ cache, không truy vấn database.
+        """
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertContains(response, "A -- 0 votes")
+
+    def test_etag_not_modified(self):
+        """
+        Gửi lại ETag cũ khi kết quả chưa đổi => 304.
+        """
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_vote_invalidates_cache(self):
+        """
+        Sau khi bình chọn, trang kết quả hiển thị số phiếu mới và ETag mới.
+        """
+        etag = self.client.get(self.url)["ETag"]
+        self.client.post(
+            reverse("polls:vote", args=(self.question.id,)), {"choice": self.choice.id}
+        )
+        response = self.client.get(self.url, headers={"if-none-match": etag})
+        self.assertContains(response, "A -- 1 vote")
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_choice_edit_invalidates_cache(self):
+        """
+        Sửa Choice (ví dụ trong admin) làm mới cache kết quả.
+        """
+        self.client.get(self.url)
+        self.choice.choice_text = "Renamed"
+        self.choice.save()
+        self.assertContains(self.client.get(self.url), "Renamed -- 0 votes")
+
+    def test_unknown_question(self):
+        """
+        Câu hỏi không tồn tại => 404.
+        """
+        response = self.client.get(reverse("polls:results", args=(9999,)))
+        self.assertEqual(response.status_code, 404)
+
+
+# --- Test cho cache danh sách câu hỏi mới nhất ---
+class LatestQuestionsCacheTests(PollsTestCase):
+
+    def test_index_uses_cache(self):
+        """
+        Lần tải index thứ hai không truy vấn database.
+        """
+        create_question("Past question.", days=-1)
+        self.client.get(reverse("polls:index"))
+        with self.assertNumQueries(0):
+            self.client.get(reverse("polls:index"))
+
+    def test_new_question_refreshes_cache(self):
+        """
+        Tạo câu hỏi mới làm mới danh sách đã cache.
+        """
+        self.client.get(reverse("polls:index"))
+        question = create_question("New question.", days=-1)
+        response = self.client.get(reverse("polls:index"))
+        self.assertQuerySetEqual(response.context["latest_question_list"], [question])
+
+    def test_pub_date_change_refreshes_cache(self):
+        """
+        Dời pub_date sang tương lai thì câu hỏi biến mất khỏi index.
+        """
+        question = create_question("Moved question.", days=-1)
+        self.client.get(reverse("polls:index"))
+        question.pub_date = timezone.now() + datetime.timedelta(days=1)
+        question.save()
+        response = self.client.get(reverse("polls:index"))
+        self.assertQuerySetEqual(response.context["latest_question_list"], [])
+
+    def test_future_question_goes_live(self):
+        """
+        Câu hỏi tương lai xuất hiện khi tới pub_date dù danh sách đã được cache.
+        """
+        question = create_question("Scheduled question.", days=1)
+        response = self.client.get(reverse("polls:index"))
+        self.assertQuerySetEqual(response.context["latest_question_list"], [])
+        later = timezone.now() + datetime.timedelta(days=2)
+        with mock.patch("polls.cache.timezone.now", return_value=later):
+            response = self.client.get(reverse("polls:index"))
+        self.assertQuerySetEqual(response.context["latest_question_list"], [question])
+
+
+# --- Test cho các view async (ASGI) ---
+class AsyncViewTests(PollsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.factory = AsyncRequestFactory()
+        self.question = create_question("Async question.", days=-1)
+        self.choice = self.question.choice_set.create(choice_text="A")
+
+    async def test_index(self):
+        """
+        IndexView async chỉ liệt kê câu hỏi đã xuất bản.
+        """
+        await Question.objects.acreate(
+            question_text="Future question.",
+            pub_date=timezone.now() + datetime.timedelta(days=1),
+        )
+        view = async_views.IndexView.as_view()
+        response = await view(self.factory.get("/polls/"))
+        self.assertContains(response, "Async question.")
+        self.assertNotContains(response, "Future question.")
+
+    async def test_detail_future_question(self):
+        """
+        DetailView async của câu hỏi tương lai => 404.
+        """
+        future = await Question.objects.acreate(
+            question_text="Future question.",
+            pub_date=timezone.now() + datetime.timedelta(days=1),
+        )
+        view = async_views.DetailView.as_view()
+        with self.assertRaises(Http404):
+            await view(self.factory.get("/"), pk=future.pk)
+
+    async def test_detail_lists_choices(self):
+        """
+        DetailView async hiển thị các lựa chọn đã prefetch.
+        """
+        view = async_views.DetailView.as_view()
+        response = await view(self.factory.get("/"), pk=self.question.pk)
+        self.assertContains(response, "A</label>")
+
+    async def test_vote_and_results(self):
+        """
+        Bình chọn qua view async rồi xem kết quả đã cập nhật.
+        """
+        request = self.factory.post("/", {"choice": self.choice.id})
+        response = await async_views.vote(request, self.question.id)
+        self.assertEqual(response.status_code, 302)
+        view = async_views.ResultsView.as_view()
+        response = await view(self.factory.get("/"), pk=self.question.pk)
+        self.assertContains(response, "A -- 1 vote")
+
+    async def test_failed_event_does_not_count_vote(self):
+        """
+        Không ghi được VoteEvent thì phiếu qua view async cũng không được tính.
+        """
+        request = self.factory.post("/", {"choice": self.choice.id})
+        with mock.patch.object(VoteEvent.objects, "create", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                await async_views.vote(request, self.question.id)
+        await self.choice.arefresh_from_db()
+        self.assertEqual(self.choice.votes, 0)
+        self.assertFalse(await VoteEvent.objects.aexists())
+
+    async def test_vote_without_choice(self):
+        """
+        Không chọn câu trả lời => hiển thị lại form với thông báo lỗi.
+        """
+        request = self.factory.post("/", {})
+        response = await async_views.vote(request, self.question.id)
+        self.assertContains(response, "Bạn chưa chọn câu trả lời.")
+
+
+# --- Test cho endpoint nhận phiếu theo lô ---
+@override_settings(POLLS_BATCH_VOTE_TOKENS=["kiosk-1"], POLLS_BATCH_VOTE_MAX_COUNT=100)
+class BatchVoteTests(PollsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.question = create_question("Batch question.", days=-1)
+        self.choice_a = self.question.choice_set.create(choice_text="A")
+        self.choice_b = self.question.choice_set.create(choice_text="B")
+
+    def post(self, payload, token="kiosk-1"):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        return self.client.post(
+            reverse("polls:batch_vote"),
+            payload,
+            content_type="application/json",
+            headers=headers,
+        )
+
+    def test_votes_are_grouped_and_applied(self):
+        """
+        Các phiếu hợp lệ được cộng dồn theo lựa chọn.
+        """
+        q = self.question.id
+        votes = [[q, self.choice_a.id, 2], [q, self.choice_b.id, 1], [q, self.choice_a.id, 3]]
+        response = self.post({"votes": votes})
+        self.assertEqual(response.json()["accepted"], 3)
+        self.choice_a.refresh_from_db()
+        self.choice_b.refresh_from_db()
+        self.assertEqual((self.choice_a.votes, self.choice_b.votes), (5, 1))
+
+    def test_per_item_errors(self):
+        """
+        Mỗi mục lỗi được báo riêng, các mục hợp lệ vẫn được ghi.
+        """
+        other = create_question("Other question.", days=-1)
+        future = create_question("Future question.", days=1)
+        future_choice = future.choice_set.create(choice_text="F")
+        q = self.question.id
+        response = self.post(
+            {
+                "votes": [
+                    [q, self.choice_a.id, 1],
+                    [other.id, self.choice_a.id, 1],
+                    [future.id, future_choice.id, 1],
+                    [q, self.choice_b.id, 0],
+                    ["x", 1],
+                ]
+            }
+        )
+        data = response.json()
+        self.assertEqual((data["accepted"], data["rejected"]), (1, 4))
+        self.assertEqual(
+            [result.get("error") for result in data["results"]],
+            [None, "unknown_choice", "unknown_choice", "invalid_count", "malformed"],
+        )
+        self.choice_a.refresh_from_db()
+        self.assertEqual(self.choice_a.votes, 1)
+
+    def test_validation_uses_one_query(self):
+        """
+        Kiểm tra hợp lệ bằng một truy vấn, ghi bằng một UPDATE.
+        """
+        q = self.question.id
+        # SELECT, SAVEPOINT, UPDATE, INSERT vote events, RELEASE
+        with self.assertNumQueries(5):
+            self.post({"votes": [[q, self.choice_a.id, 1], [q, self.choice_b.id, 1]]})
+
+    def test_invalidates_results_cache(self):
+        """
+        Kết quả đã cache được làm mới sau khi nhận lô phiếu.
+        """
+        url = reverse("polls:results", args=(self.question.id,))
+        self.client.get(url)
+        self.post({"votes": [[self.question.id, self.choice_b.id, 2]]})
+        self.assertContains(self.client.get(url), "B -- 2 votes")
+
+    def test_malformed_body(self):
+        """
+        Body không đúng định dạng => 400.
+        """
+        response = self.post({"items": []})
+        self.assertEqual(response.status_code, 400)
+
+    def test_many_choices_fit_budget(self):
+        """
+        Lô phủ hơn ADD_VOTES_BATCH_SIZE lựa chọn cần nhiều UPDATE, vẫn trong budget.
+        """
+        choices = Choice.objects.bulk_create(
+            Choice(question=self.question, choice_text=str(i))
+            for i in range(ChoiceQuerySet.ADD_VOTES_BATCH_SIZE + 1)
+        )
+        response = self.post({"votes": [[self.question.id, c.id, 1] for c in choices]})
+        self.assertEqual(response.json()["accepted"], len(choices))
+
+    def test_requires_token(self):
+        """
+        Thiếu token hoặc token sai => 401, không phiếu nào được ghi.
+        """
+        votes = {"votes": [[self.question.id, self.choice_a.id, 1]]}
+        self.assertEqual(self.post(votes, token=None).status_code, 401)
+        self.assertEqual(self.post(votes, token="guess").status_code, 401)
+        self.choice_a.refresh_from_db()
+        self.assertEqual(self.choice_a.votes, 0)
+
+    def test_counts_are_capped(self):
+        """
+        Số phiếu quá lớn, hoặc tổng theo lựa chọn vượt giới hạn => invalid_count.
+        """
+        q = self.question.id
+        response = self.post(
+            {
+                "votes": [
+                    [q, self.choice_a.id, 2**70],
+                    [q, self.choice_b.id, 60],
+                    [q, self.choice_b.id, 60],
+                    [q, self.choice_b.id, 40],
+                ]
+            }
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [result.get("error") for result in response.json()["results"]],
+            ["invalid_count", None, "invalid_count", None],
+        )
+        self.choice_b.refresh_from_db()
+        self.assertEqual(self.choice_b.votes, 100)
+
+
+# --- Test cho query budget ---
+class QueryBudgetTests(PollsTestCase):
+
+    def test_view_over_budget_fails(self):
+        """
+        View chạy nhiều truy vấn hơn budget => QueryBudgetExceeded.
+        """
+        @query_budget(1)
+        def view(request):
+            Question.objects.count()
+            Choice.objects.count()
+            return HttpResponse()
+
+        with self.assertRaises(QueryBudgetExceeded):
+            view(RequestFactory().get("/"))
+
+    def test_extra_queries_raise_budget(self):
+        """
+        allow_extra_queries() nới budget của view đang chạy.
+        """
+        @query_budget(1)
+        def view(request):
+            allow_extra_queries(1)
+            Question.objects.count()
+            Choice.objects.count()
+            return HttpResponse()
+
+        self.assertEqual(view(RequestFactory().get("/")).status_code, 200)
+
+    def test_budget_not_enforced_when_disabled(self):
+        """
+        Khi tắt POLLS_ENFORCE_QUERY_BUDGETS, view không bị kiểm tra.
+        """
+
+        @query_budget(0)
+        def view(request):
+            return HttpResponse(str(Question.objects.count()))
+
+        with self.settings(POLLS_ENFORCE_QUERY_BUDGETS=False):
+            self.assertEqual(view(RequestFactory().get("/")).content, b"0")
+
+    def test_detail_query_count_is_constant(self):
+        """
+        DetailView prefetch choices: số truy vấn không phụ thuộc số lựa chọn.
+        """
+        question = create_question("Many choices.", days=-1)
+        for i in range(10):
+            question.choice_set.create(choice_text=f"Choice {i}")
+        with self.assertNumQueries(2):
+            self.client.get(reverse("polls:detail", args=(question.id,)))
+
+    def test_vote_error_page_within_budget(self):
+        """
+        Trang lỗi khi chưa chọn câu trả lời vẫn nằm trong budget của vote.
+        """
+        question = create_question("Question.", days=-1)
+        question.choice_set.create(choice_text="A")
+        response = self.client.post(reverse("polls:vote", args=(question.id,)), {})
+        self.assertContains(response, "A</label>")
+
+
+# --- Test cho export kết quả dạng stream ---
+class ExportResultsTests(PollsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.question = create_question("Export question.", days=-1)
+        self.question.choice_set.create(choice_text="A", votes=3)
+        self.question.choice_set.create(choice_text="B, with comma", votes=1)
+        create_question("No choices.", days=-1)
+        staff = User.objects.create_user("staff", is_staff=True)
+        self.client.force_login(staff)
+
+    def test_csv_export(self):
+        """
+        Export CSV trả về stream, mỗi lựa chọn một dòng.
+        """
+        response = self.client.get(reverse("polls:export", args=("csv",)))
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            lines[0], "question_id,question_text,pub_date,choice_id,choice_text,votes"
+        )
+        self.assertEqual(len(lines), 4)
+        self.assertIn('"B, with comma",1', lines[2])
+
+    def test_ndjson_export(self):
+        """
+        Export NDJSON: mỗi dòng là một object JSON.
+        """
+        response = self.client.get(reverse("polls:export", args=("ndjson",)))
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([row["votes"] for row in rows], [3, 1, None])
+
+    def test_requires_staff(self):
+        """
+        Người dùng chưa đăng nhập bị chuyển tới trang đăng nhập admin.
+        """
+        self.client.logout()
+        response = self.client.get(reverse("polls:export", args=("csv",)))
+        self.assertEqual(response.status_code, 302)
+
+    def test_management_command(self):
+        """
+        Lệnh export_results ghi cùng nội dung ra stdout.
+        """
+        out = StringIO()
+        call_command("export_results", format="csv", stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 4)
+
+
+# --- Test cho admin Question ở chế độ bảng lớn ---
+@override_settings(POLLS_ADMIN_LARGE_TABLE=True)
+class LargeTableAdminTests(PollsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        admin_user = User.objects.create_superuser("admin")
+        self.client.force_login(admin_user)
+        self.url = reverse("admin:polls_question_changelist")
+        for i in range(105):
+            create_question(f"Question {i:03}", days=-i)
+
+    def test_keyset_pages(self):
+        """
+        Trang sau lấy bằng cursor, không dùng OFFSET hay COUNT(*) chính xác.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        sql = " ".join(query["sql"] for query in queries)
+        self.assertNotIn("OFFSET", sql)
+        self.assertNotIn("COUNT(*)", sql)
+        page = response.context["cl"]
+        self.assertEqual(len(page.result_list), 100)
+        self.assertEqual(page.result_list[0].question_text, "Question 000")
+        response = self.client.get(self.url + page.next_page_url)
+        page = response.context["cl"]
+        self.assertEqual(
+            [q.question_text for q in page.result_list],
+            [f"Question {i:03}" for i in range(100, 105)],
+        )
+        self.assertIsNone(page.next_cursor)
+        self.assertContains(response, "First page")
+
+    def test_prefix_search(self):
+        """
+        Tìm kiếm theo tiền tố của question_text.
+        """
+        create_question("Apple pie?", days=-1)
+        create_question("Pineapple?", days=-1)
+        response = self.client.get(self.url, {"q": "apple"})
+        self.assertEqual(
+            [q.question_text for q in response.context["cl"].result_list],
+            ["Apple pie?"],
+        )
+
+    def test_invalid_cursor(self):
+        """
+        Cursor không hợp lệ => admin báo lỗi tham số (redirect ?e=1).
+        """
+        response = self.client.get(self.url, {"after": "garbage"})
+        self.assertEqual(response.status_code, 302)
+
+    def test_recent_flag_computed_in_sql(self):
+        """
+        Cờ "Published recently?" lấy từ annotation và sắp xếp được.
+        """
+        response = self.client.get(self.url)
+        first = response.context["cl"].result_list[0]
+        self.assertIs(first.is_recent, True)
+        with self.settings(POLLS_ADMIN_LARGE_TABLE=False):
+            response = self.client.get(self.url, {"o": "-3"})
+        first = response.context["cl"].result_list[0]
+        self.assertEqual(first.question_text, "Question 000")
+
+
+# --- Test cho thống kê phiếu theo giờ/ngày ---
+class VoteAnalyticsTests(PollsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.question = create_question("Analytics question.", days=-3)
+        self.choice = self.question.choice_set.create(choice_text="A")
+        self.later = timezone.now() + datetime.timedelta(minutes=1)
+
+    def add_event(self, hours_ago, count=1):
+        VoteEvent.objects.create(
+            choice=self.choice,
+            count=count,
+            created=timezone.now() - datetime.timedelta(hours=hours_ago),
+        )
+
+    def test_vote_appends_event(self):
+        """
+        Mỗi lần bình chọn ghi thêm một VoteEvent.
+        """
+        self.client.post(
+            reverse("polls:vote", args=(self.question.id,)), {"choice": self.choice.id}
+        )
+        self.assertEqual(VoteEvent.objects.get().choice, self.choice)
+
+    def test_failed_event_does_not_count_vote(self):
+        """
+        Không ghi được VoteEvent thì phiếu cũng không được tính.
+        """
+        url = reverse("polls:vote", args=(self.question.id,))
+        with mock.patch.object(VoteEvent.objects, "create", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.client.post(url, {"choice": self.choice.id})
+        self.choice.refresh_from_db()
+        self.assertEqual(self.choice.votes, 0)
+
+    def test_rollup_into_buckets(self):
+        """
+        Rollup cộng sự kiện vào bucket giờ và ngày, chạy lại không cộng trùng.
+        """
+        self.add_event(hours_ago=0, count=2)
+        self.add_event(hours_ago=0)
+        self.add_event(hours_ago=30)
+        self.assertEqual(rollup_vote_events(now=self.later), 3)
+        self.assertEqual(rollup_vote_events(now=self.later), 0)
+        self.assertEqual(
+            sorted(HourlyVoteRollup.objects.values_list("votes", flat=True)), [1, 3]
+        )
+        self.assertEqual(sum(DailyVoteRollup.objects.values_list("votes", flat=True)), 4)
+        self.add_event(hours_ago=0)
+        rollup_vote_events(now=self.later)
+        self.assertEqual(
+            sorted(HourlyVoteRollup.objects.values_list("votes", flat=True)), [1, 4]
+        )
+
+    def test_recent_events_wait_for_lag(self):
+        """
+        Sự kiện mới hơn POLLS_ROLLUP_LAG chờ tới lần rollup sau.
+        """
+        self.add_event(hours_ago=0)
+        self.assertEqual(rollup_vote_events(), 0)
+
+    def test_timeseries_endpoint(self):
+        """
+        API trả chuỗi thời gian từ bảng rollup.
+        """
+        self.add_event(hours_ago=0, count=2)
+        rollup_vote_events(now=self.later)
+        url = reverse("polls:timeseries", args=(self.question.id,))
+        data = self.client.get(url, {"bucket": "day"}).json()
+        self.assertEqual(data["series"][0]["choice"], self.choice.id)
+        self.assertEqual([p["votes"] for p in data["series"][0]["points"]], [2])
+        self.assertEqual(self.client.get(url, {"bucket": "week"}).status_code, 400)
+
+    def test_prune_rolled_up_events(self):
+        """
+        Chỉ xóa sự kiện đã được rollup.
+        """
+        self.add_event(hours_ago=0)
+        rollup_vote_events(now=self.later)
+        self.add_event(hours_ago=0)
+        self.assertEqual(prune_vote_events(before=self.later), 1)
+        self.assertEqual(VoteEvent.objects.count(), 1)
@@ -1,11 +1,17 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+routes = async_views if getattr(settings, "POLLS_ASYNC_VIEWS", False) else views
 
 app_name = "polls"
 
 urlpatterns = [
-    path("", views.IndexView.as_view(), name="index"),
-    path("<int:pk>/", views.DetailView.as_view(), name="detail"),
-    path("<int:pk>/results/", views.ResultsView.as_view(), name="results"),
-    path("<int:question_id>/vote/", views.vote, name="vote"),
+    path("", routes.IndexView.as_view(), name="index"),
+    path("<int:pk>/", routes.DetailView.as_view(), name="detail"),
+    path("<int:pk>/results/", routes.ResultsView.as_view(), name="results"),
+    path("<int:question_id>/vote/", routes.vote, name="vote"),
+    path("<int:pk>/timeseries/", views.vote_timeseries_view, name="timeseries"),
+    path("votes/batch/", views.batch_vote, name="batch_vote"),
+    path("export.<str:fmt>", views.export_results, name="export"),
 ]
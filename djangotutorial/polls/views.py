@@ -1,30 +1,82 @@
-from django.db.models import F
-from django.http import HttpResponseRedirect
+import hmac
+import json
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import transaction
+from django.db.models import F, prefetch_related_objects
+from django.http import (
+    Http404,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404, render
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.cache import get_conditional_response
+from django.utils.decorators import method_decorator
 from django.views import generic
-from .models import Choice, Question
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from .cache import (
+    get_results,
+    invalidate_results,
+    latest_questions,
+    results_etag,
+)
+from .analytics import BUCKETS, vote_timeseries
+from .export import FORMATS, export_lines
+from .models import Choice, Question, VoteEvent
+from .query_budget import query_budget
+from .vote_buffer import vote_buffer
 
 
+@method_decorator(query_budget(2), name="dispatch")
 class IndexView(generic.ListView):
     template_name = "polls/index.html"
     context_object_name = "latest_question_list"
 
     def get_queryset(self):
         """Return the last five published questions."""
-        return Question.objects.order_by("-pub_date")[:5]
+        return latest_questions()
 
 
+@method_decorator(query_budget(2), name="dispatch")
 class DetailView(generic.DetailView):
     model = Question
     template_name = "polls/detail.html"
 
+    def get_queryset(self):
+        """Excludes any questions that aren't published yet."""
+        return Question.objects.filter(pub_date__lte=timezone.now()).prefetch_related(
+            "choice_set"
+        )
 
-class ResultsView(generic.DetailView):
-    model = Question
-    template_name = "polls/results.html"
+
+def render_results(request, results):
+    """Render results, answering repeat viewers with 304 via the ETag."""
+    if results is None or results["question"]["pub_date"] > timezone.now():
+        raise Http404("No Question matches the given query.")
+    etag = results_etag(results)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = render(request, "polls/results.html", results)
+    response["ETag"] = etag
+    # Luôn hỏi lại server, nhưng chỉ tải lại khi kết quả thay đổi.
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+@method_decorator(query_budget(2), name="dispatch")
+class ResultsView(generic.View):
+    def get(self, request, pk):
+        return render_results(request, get_results(pk))
 
 
+@query_budget(7)
 def vote(request, question_id):
     """Handle voting for a question's choice."""
     question = get_object_or_404(Question, pk=question_id)
@@ -32,6 +84,7 @@ def vote(request, question_id):
         selected_choice = question.choice_set.get(pk=request.POST["choice"])
     except (KeyError, Choice.DoesNotExist):
         # Redisplay the question voting form with error
+        prefetch_related_objects([question], "choice_set")
         return render(
             request,
             "polls/detail.html",
@@ -41,7 +94,148 @@ def vote(request, question_id):
             },
         )
     else:
-        selected_choice.votes = F("votes") + 1
-        selected_choice.save()
+        if vote_buffer.enabled:
+            if vote_buffer.add(selected_choice.id):
+                vote_buffer.flush()
+        else:
+            selected_choice.votes = F("votes") + 1
+            # Phiếu và VoteEvent cùng được ghi hoặc cùng bị hủy.
+            with transaction.atomic():
+                selected_choice.save()
+                VoteEvent.objects.create(choice=selected_choice)
         # Redirect to the results page to prevent double-posting
         return HttpResponseRedirect(reverse("polls:results", args=(question.id,)))
+
+
+def _parse_batch_item(item):
+    """Return (question_id, choice_id, count) or None if malformed."""
+    if not isinstance(item, (list, tuple)) or len(item) != 3:
+        return None
+    if not all(isinstance(value, int) and not isinstance(value, bool) for value in item):
+        return None
+    return tuple(item)
+
+
+def _has_batch_token(request):
+    """Whether the request carries one of ``POLLS_BATCH_VOTE_TOKENS``."""
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    return any(
+        hmac.compare_digest(token.encode(), allowed.encode())
+        for allowed in getattr(settings, "POLLS_BATCH_VOTE_TOKENS", ())
+    )
+
+
+# Máy kiosk/offline không có phiên trình duyệt nên không gửi được CSRF token;
+# thay vào đó mỗi máy gửi một token riêng trong header Authorization.
+@csrf_exempt
+@require_POST
+@query_budget(5)
+def batch_vote(request):
+    """
+    Apply votes collected offline in one transaction.
+
+    The body is ``{"votes": [[question_id, choice_id, count], ...]}`` and the
+    request must send ``Authorization: Bearer <token>`` with one of
+    ``POLLS_BATCH_VOTE_TOKENS``. All items are validated with a single
+    query, valid ones are summed per choice and applied as batched
+    increments, and the response reports the outcome of every item in
+    order. An item whose count would take its choice over
+    ``POLLS_BATCH_VOTE_MAX_COUNT`` for the batch is rejected.
+    """
+    if not _has_batch_token(request):
+        return JsonResponse({"error": "A valid batch token is required."}, status=401)
+    try:
+        items = json.loads(request.body)["votes"]
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse(
+            {"error": "Expected a JSON object with a 'votes' list."}, status=400
+        )
+    max_items = getattr(settings, "POLLS_BATCH_VOTE_MAX_ITEMS", 1000)
+    if not isinstance(items, list) or len(items) > max_items:
+        return JsonResponse(
+            {"error": f"'votes' must be a list of at most {max_items} items."}, status=400
+        )
+
+    parsed = [_parse_batch_item(item) for item in items]
+    question_ids = {item[0] for item in parsed if item}
+    valid_choices = set(
+        Choice.objects.filter(
+            question_id__in=question_ids, question__pub_date__lte=timezone.now()
+        ).values_list("question_id", "id")
+    )
+
+    max_count = getattr(settings, "POLLS_BATCH_VOTE_MAX_COUNT", 1000)
+    results = []
+    increments = Counter()
+    for item in parsed:
+        if item is None:
+            results.append({"status": "error", "error": "malformed"})
+        elif not 1 <= item[2] <= max_count - increments[item[1]]:
+            results.append({"status": "error", "error": "invalid_count"})
+        elif item[:2] not in valid_choices:
+            results.append({"status": "error", "error": "unknown_choice"})
+        else:
+            increments[item[1]] += item[2]
+            results.append({"status": "ok"})
+
+    with transaction.atomic():
+        Choice.objects.add_votes(increments)
+    for question_id in {item[0] for item in parsed if item and item[1] in increments}:
+        invalidate_results(question_id)
+    return JsonResponse(
+        {
+            "accepted": sum(result["status"] == "ok" for result in results),
+            "rejected": sum(result["status"] == "error" for result in results),
+            "results": results,
+        }
+    )
+
+
+@staff_member_required
+def export_results(request, fmt):
+    """Stream every question's choices and vote counts as CSV or NDJSON."""
+    if fmt not in FORMATS:
+        raise Http404("Unknown export format.")
+    response = StreamingHttpResponse(export_lines(fmt), content_type=FORMATS[fmt])
+    response["Content-Disposition"] = f'attachment; filename="poll-results.{fmt}"'
+    return response
+
+
+@query_budget(2)
+def vote_timeseries_view(request, pk):
+    """
+    Return votes per hour or day for each choice of a question as JSON.
+
+    Query parameters: ``bucket`` (``hour`` or ``day``) and optional ISO
+    ``since``/``until`` bounds. Data comes from the rollup tables only.
+    """
+    bucket = request.GET.get("bucket", "hour")
+    if bucket not in BUCKETS:
+        return JsonResponse({"error": "bucket must be 'hour' or 'day'."}, status=400)
+    bounds = {}
+    for name in ("since", "until"):
+        if name in request.GET:
+            bounds[name] = parse_datetime(request.GET[name])
+            if bounds[name] is None:
+                return JsonResponse({"error": f"Invalid '{name}' datetime."}, status=400)
+    question = get_object_or_404(
+        Question.objects.filter(pub_date__lte=timezone.now()), pk=pk
+    )
+    series = vote_timeseries(question.id, bucket, **bounds)
+    return JsonResponse(
+        {
+            "question": question.id,
+            "bucket": bucket,
+            "series": [
+                {
+                    "choice": choice_id,
+                    "points": [
+                        {"start": start, "votes": votes} for start, votes in points
+                    ],
+                }
+                for choice_id, points in series.items()
+            ],
+        }
+    )
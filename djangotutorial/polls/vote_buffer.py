@@ -0,0 +1,115 @@
+"""
+Write-behind buffer for poll votes.
+
+When ``POLLS_VOTE_BUFFER["ENABLED"]`` is set, ``polls.views.vote`` adds the
+vote to an in-process counter keyed by choice id instead of updating the
+``Choice`` row. The counter is flushed to ``Choice.votes`` with batched
+UPDATEs once it holds ``MAX_PENDING`` votes or ``FLUSH_INTERVAL`` seconds
+have passed since the last flush, and once more when the process exits.
+The time trigger is a daemon ``threading.Timer`` armed by the first vote
+that lands in an empty buffer, so it fires even if no other vote arrives.
+
+Votes being flushed stay visible through ``pending()`` until their UPDATE
+has committed, so cached results do not dip while a flush is in flight.
+"""
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import Choice
+
+DEFAULTS = {
+    "ENABLED": False,
+    "MAX_PENDING": 100,
+    "FLUSH_INTERVAL": 2.0,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, "POLLS_VOTE_BUFFER", {})}
+
+
+class VoteBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._flushing = Counter()
+        self._last_flush = time.monotonic()
+        self._timer = None
+
+    @property
+    def enabled(self):
+        return get_config()["ENABLED"]
+
+    def add(self, choice_id, count=1):
+        """
+        Buffer ``count`` votes for a choice.
+
+        Return True when the size or time trigger says the caller should
+        flush now.
+        """
+        config = get_config()
+        with self._lock:
+            self._pending[choice_id] += count
+            size = sum(self._pending.values())
+            elapsed = time.monotonic() - self._last_flush
+            self._arm_timer(config["FLUSH_INTERVAL"])
+        return size >= config["MAX_PENDING"] or elapsed >= config["FLUSH_INTERVAL"]
+
+    def _arm_timer(self, interval):
+        # Gọi khi đang giữ self._lock.
+        if self._timer is None and self._pending:
+            self._timer = threading.Timer(interval, self._flush_on_timer)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_on_timer(self):
+        try:
+            self.flush()
+        finally:
+            # Thread của timer tự mở kết nối DB riêng; đóng lại khi xong.
+            connection.close()
+
+    def pending(self, choice_ids=None):
+        """Return buffered (not yet persisted) counts as {choice_id: count}."""
+        with self._lock:
+            pending = self._pending + self._flushing
+        if choice_ids is None:
+            return dict(pending)
+        return {pk: pending[pk] for pk in choice_ids if pk in pending}
+
+    def flush(self):
+        """Persist buffered votes and return the number of votes written."""
+        from .cache import invalidate_results_for_choices
+
+        with self._lock:
+            batch, self._pending = self._pending, Counter()
+            self._flushing.update(batch)
+            self._last_flush = time.monotonic()
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not batch:
+            return 0
+        try:
+            with transaction.atomic():
+                Choice.objects.add_votes(batch)
+        except Exception:
+            # Trả lại các phiếu chưa ghi để lần flush sau thử lại.
+            with self._lock:
+                self._flushing.subtract(batch)
+                self._flushing = +self._flushing
+                self._pending.update(batch)
+                self._arm_timer(get_config()["FLUSH_INTERVAL"])
+            raise
+        with self._lock:
+            self._flushing.subtract(batch)
+            self._flushing = +self._flushing
+        invalidate_results_for_choices(batch)
+        return sum(batch.values())
+
+
+vote_buffer = VoteBuffer()
@@ -0,0 +1,55 @@
+"""
+Shared setup for the snippets benchmarks.
+
+Benchmarks run against a throwaway SQLite file so they never touch
+``db.sqlite3``.
+"""
+import os
+import tempfile
+
+
+def setup_django(db_path=None, **overrides):
+    """
+    Configure Django on a migrated database and return its path.
+
+    Without ``db_path`` a fresh temporary file is used; the caller removes
+    it. ``overrides`` are applied to ``django.conf.settings`` before setup.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tutorial.settings')
+    from django.conf import settings
+
+    if db_path is None:
+        fd, db_path = tempfile.mkstemp(prefix='snippets-bench-', suffix='.sqlite3')
+        os.close(fd)
+    settings.DATABASES['default']['NAME'] = db_path
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['testserver', 'localhost', '127.0.0.1']
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command('migrate', verbosity=0)
+    return db_path
+
+
+def seed_snippets(count, batch_size=5000, code='print("hello")\n'):
+    """
+    Bulk insert ``count`` already highlighted snippets owned by one user and
+    return the user. ``save()`` is bypassed, so nothing is rendered.
+    """
+    from django.contrib.auth.models import User
+    from snippets.highlighting import render_html
+    from snippets.models import Snippet
+
+    owner, _ = User.objects.get_or_create(username='bench')
+    html = render_html(code, 'python', False)
+    for start in range(0, count, batch_size):
+        Snippet.objects.bulk_create(
+            Snippet(owner=owner, title=f'Snippet {i}', code=code, highlighted=html,
+                    highlight_status=Snippet.HighlightStatus.READY)
+            for i in range(start, min(start + batch_size, count))
+        )
+    return owner
@@ -0,0 +1,73 @@
+"""
+Compare page latency of offset and keyset pagination on the snippet list.
+
+Run from the ``lab4`` directory:
+
+    python -m benchmarks.pagination --snippets 200000 --pages 1 1000 10000
+
+``offset`` is DRF's ``PageNumberPagination`` (``COUNT(*)`` plus ``OFFSET``);
+``keyset`` is ``snippets.pagination.KeysetPagination`` seeking on
+(created, id), with a cursor pointing at the same depth.
+"""
+import argparse
+import os
+import statistics
+import time
+
+from .common import seed_snippets, setup_django
+
+
+def fetch(client, url, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(url)
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.status_code
+    return statistics.median(timings), response.json()
+
+
+def keyset_url(page):
+    """Build the cursor URL of ``page`` from the last row of the page before."""
+    from snippets.models import Snippet
+    from snippets.pagination import KeysetPagination
+
+    paginator = KeysetPagination()
+    if page == 1:
+        return '/api/snippets/'
+    row = (Snippet.objects.order_by('created', 'id')
+           .only('created', 'id')[(page - 1) * paginator.page_size - 1])
+    paginator.base_url = 'http://testserver/api/snippets/'
+    return paginator.encode_cursor(paginator.row_values(row))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--snippets', type=int, default=200_000)
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    db_path = setup_django()
+    try:
+        from rest_framework.pagination import PageNumberPagination
+        from rest_framework.test import APIClient
+        from snippets.pagination import KeysetPagination
+        from snippets.views import SnippetViewSet
+
+        seed_snippets(args.snippets)
+        client = APIClient()
+        print(f'{args.snippets} snippets, median of {args.repeat} requests')
+        for page in args.pages:
+            SnippetViewSet.pagination_class = PageNumberPagination
+            offset, _ = fetch(client, f'/api/snippets/?page={page}', args.repeat)
+            SnippetViewSet.pagination_class = KeysetPagination
+            keyset, _ = fetch(client, keyset_url(page), args.repeat)
+            print(f'page {page:>6}: offset {offset * 1000:7.2f} ms'
+                  f'  keyset {keyset * 1000:7.2f} ms')
+    finally:
+        os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
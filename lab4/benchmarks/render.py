@@ -0,0 +1,79 @@
+"""
+Per-snippet rendering cost with and without the lexer/formatter pool.
+
+Run from the ``lab4`` directory:
+
+    python -m benchmarks.render --snippets 2000
+
+``fresh`` looks up the lexer and builds an ``HtmlFormatter`` for every
+snippet, as ``Snippet.save()`` used to; ``pooled`` goes through
+``snippets.highlighting.render_html()``. The HTML cache is not involved.
+"""
+import argparse
+import random
+import statistics
+import time
+
+from pygments import highlight
+from pygments.formatters.html import HtmlFormatter
+from pygments.lexers import get_lexer_by_name
+
+from snippets.highlighting import render_html, renderer_pool
+
+SAMPLES = {
+    'python': 'def add(a, b):\n    return a + b\n',
+    'javascript': 'const add = (a, b) => a + b;\n',
+    'sql': 'SELECT id, title FROM snippets_snippet WHERE id > 10;\n',
+    'bash': 'for f in *.py; do echo "$f"; done\n',
+    'html': '<p class="note">Hello</p>\n',
+}
+
+
+def render_fresh(code, language, linenos):
+    lexer = get_lexer_by_name(language)
+    formatter = HtmlFormatter(linenos='table' if linenos else False)
+    return highlight(code, lexer, formatter)
+
+
+def build_workload(count, seed):
+    rng = random.Random(seed)
+    workload = []
+    for _ in range(count):
+        language = rng.choice(list(SAMPLES))
+        workload.append((SAMPLES[language], language, rng.random() < 0.5))
+    return workload
+
+
+def measure(render, workload):
+    timings = []
+    for code, language, linenos in workload:
+        start = time.perf_counter()
+        render(code, language, linenos)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--snippets', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    workload = build_workload(args.snippets, args.seed)
+    renderer_pool.clear()
+    # Warm up imports of the lexer modules so both variants start even.
+    measure(render_fresh, workload[:50])
+    results = {
+        'fresh': measure(render_fresh, workload),
+        'pooled': measure(render_html, workload),
+    }
+    for name, timings in results.items():
+        print(f'{name:>6}: mean {statistics.mean(timings) * 1e6:8.1f} us'
+              f'  median {statistics.median(timings) * 1e6:8.1f} us'
+              f'  p99 {sorted(timings)[int(len(timings) * 0.99)] * 1e6:8.1f} us')
+    speedup = statistics.mean(results['fresh']) / statistics.mean(results['pooled'])
+    print(f'speedup: {speedup:.2f}x over {len(workload)} snippets')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Search latency over a large snippets table: FTS5 index vs. ``icontains``.
+
+Run from the ``lab4`` directory:
+
+    python -m benchmarks.search --snippets 1000000
+
+Seeds a temporary database with generated code (the search triggers index
+every row on insert), then times a mix of rare, common and prefix queries
+through ``snippets.search.search()`` and an ``icontains`` scan for the first
+20 matching rows.
+
+The scan is unranked, so for common words it stops after a few hundred rows
+while FTS ranks every match: ranked queries cost time proportional to the
+number of matches, rare and missing words are what the index makes cheap.
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+
+from .common import setup_django
+
+WORDS = [
+    'parser', 'argument', 'request', 'response', 'handler', 'session', 'token',
+    'cursor', 'buffer', 'stream', 'client', 'server', 'config', 'logger',
+    'render', 'format', 'schema', 'field', 'record', 'query', 'filter', 'cache',
+]
+QUERIES = ['tokenizer', 'parser', 'cursor buffer', 'stre', 'zzznomatch']
+
+
+def make_code(rng):
+    lines = []
+    for _ in range(rng.randint(3, 12)):
+        name, call, arg = rng.sample(WORDS, 3)
+        lines.append(f'{name}_{rng.randint(0, 999)} = {call}({arg})')
+    if rng.random() < 0.001:
+        lines.append('tokenizer = build_tokenizer()')
+    return '\n'.join(lines) + '\n'
+
+
+def seed(count, batch_size, seed):
+    from django.contrib.auth.models import User
+    from django.db import transaction
+    from snippets.models import Snippet
+
+    rng = random.Random(seed)
+    owner = User.objects.create(username='bench')
+    languages = ['python', 'javascript', 'sql']
+    for start in range(0, count, batch_size):
+        with transaction.atomic():
+            Snippet.objects.bulk_create(
+                Snippet(owner=owner, title=f'{rng.choice(WORDS)} example {i}',
+                        code=make_code(rng), language=rng.choice(languages),
+                        highlight_status=Snippet.HighlightStatus.READY)
+                for i in range(start, min(start + batch_size, count))
+            )
+
+
+def timed(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--snippets', type=int, default=1_000_000)
+    parser.add_argument('--batch-size', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    db_path = setup_django()
+    try:
+        from snippets import search
+        from snippets.models import Snippet
+
+        start = time.perf_counter()
+        seed(args.snippets, args.batch_size, args.seed)
+        print(f'seeded {args.snippets} snippets in {time.perf_counter() - start:.1f} s')
+
+        for text in QUERIES:
+            fts, results = timed(lambda: search.search(text, limit=20), args.repeat)
+            scan = Snippet.objects.only('id')
+            for word in text.split():
+                scan = scan.filter(code__icontains=word)
+            naive, _ = timed(lambda: list(scan[:20]), args.repeat)
+            print(f'{text!r:>16}: fts {fts * 1000:8.2f} ms'
+                  f'  icontains {naive * 1000:8.2f} ms  ({len(results)} results)')
+    finally:
+        os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
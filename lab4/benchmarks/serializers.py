@@ -0,0 +1,104 @@
+"""
+Compare rows/sec of the stock and compiled serializers on list endpoints.
+
+Run from the ``lab4`` directory:
+
+    python -m benchmarks.serializers --rows 20000 --page-size 100
+
+Each case serializes ``--rows`` rows in pages of ``--page-size`` through
+the stock ``many=True`` serializer (with the viewset's own queryset) and
+through ``snippets.compiled.CompiledSerializer``, built once per page as
+the list action does. Query time is included.
+"""
+import argparse
+import os
+import time
+
+from .common import seed_snippets, setup_django
+
+
+def rows_per_second(serialize_page, rows, page_size, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = sum(len(serialize_page(offset))
+                    for offset in range(0, rows, page_size))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return count / best
+
+
+def cases():
+    from django.contrib.auth.models import Group, User
+    from django.db.models import Prefetch
+    from snippets import serializers as snippets
+    from snippets.models import Snippet
+    from tutorial.quickstart import serializers as quickstart
+
+    yield ('snippets', snippets.SnippetSerializer,
+           Snippet.objects.select_related('owner'))
+    yield ('snippet users', snippets.UserSerializer, User.objects.prefetch_related(
+        Prefetch('snippets', queryset=Snippet.objects.only('id', 'owner_id'))))
+    yield ('quickstart users', quickstart.UserSerializer, User.objects.prefetch_related(
+        Prefetch('groups', queryset=Group.objects.only('id'))))
+
+
+def seed_users(count, groups=3, batch_size=5000):
+    from django.contrib.auth.models import Group, User
+
+    groups = [Group.objects.get_or_create(name=f'group {i}')[0] for i in range(groups)]
+    for start in range(0, count, batch_size):
+        stop = min(start + batch_size, count)
+        users = User.objects.bulk_create(
+            User(username=f'user{i}') for i in range(start, stop)
+        )
+        User.groups.through.objects.bulk_create(
+            User.groups.through(user_id=user.pk, group_id=group.pk)
+            for user in users for group in groups[:user.pk % (len(groups) + 1)]
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=20_000)
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    db_path = setup_django()
+    try:
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+        from snippets.compiled import CompiledSerializer
+
+        seed_snippets(args.rows)
+        seed_users(args.rows)
+        request = Request(APIRequestFactory().get('/'))
+        context = {'request': request}
+
+        print(f'{args.rows} rows in pages of {args.page_size}, best of {args.repeat}')
+        for name, serializer_class, queryset in cases():
+            queryset = queryset.order_by('pk')
+
+            def stock(offset):
+                page = queryset[offset:offset + args.page_size]
+                return serializer_class(page, many=True, context=context).data
+
+            def compiled(offset):
+                # Compiled once per page, as the list action does per request.
+                compiled = CompiledSerializer(serializer_class(context=context))
+                page = compiled.select(queryset)[offset:offset + args.page_size]
+                return compiled.serialize(page)
+
+            stock_rate = rows_per_second(stock, args.rows, args.page_size, args.repeat)
+            compiled_rate = rows_per_second(compiled, args.rows, args.page_size,
+                                            args.repeat)
+            print(f'{name:>16}: stock {stock_rate:9.0f} rows/s'
+                  f'  compiled {compiled_rate:9.0f} rows/s'
+                  f'  ({compiled_rate / stock_rate:.1f}x)')
+    finally:
+        os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Measure process start-up cost of the snippets app.
+
+Run from the ``lab4`` directory:
+
+    python -m benchmarks.startup --runs 20
+
+Each run is a fresh interpreter that calls ``django.setup()``, imports
+``snippets.models`` and then runs the system checks, as ``manage.py check``,
+``test``, ``migrate`` and ``runserver`` do. The checks read the choices of
+every field. ``tables`` reads the lexer and style choices from the generated
+``snippets.choice_tables``; ``registry`` hides that module so they are built
+by walking the Pygments registry. Both ``setup`` (setup and import only) and
+``check`` (the whole start-up) are reported.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = '''
+import os, sys, time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tutorial.settings')
+if sys.argv[1] == 'registry':
+    sys.modules['snippets.choice_tables'] = None  # import raises ImportError
+start = time.perf_counter()
+import django
+django.setup()
+import snippets.models
+setup = time.perf_counter() - start
+import io
+from django.core.management import call_command
+call_command('check', stdout=io.StringIO())
+print(setup, time.perf_counter() - start)
+'''
+
+
+def measure(variant, runs):
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='1')
+    timings = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE, variant],
+            check=True, capture_output=True, text=True, env=env,
+        ).stdout
+        setup, check = map(float, output.split())
+        timings.append({'setup': setup, 'check': check})
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--json', action='store_true', help='print raw results as JSON')
+    args = parser.parse_args(argv)
+
+    results = {variant: measure(variant, args.runs)
+               for variant in ('tables', 'registry')}
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for phase in ('setup', 'check'):
+        medians = {}
+        for variant, timings in results.items():
+            values = [timing[phase] for timing in timings]
+            medians[variant] = statistics.median(values)
+            print(f'{phase:>5} {variant:>8}: median {medians[variant] * 1000:7.1f} ms'
+                  f'  min {min(values) * 1000:7.1f} ms  ({len(values)} runs)')
+        saved = medians['registry'] - medians['tables']
+        print(f'{phase:>5}    saved: {saved * 1000:.1f} ms per process start')
+
+
+if __name__ == '__main__':
+    main()
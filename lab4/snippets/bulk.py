@@ -0,0 +1,119 @@
+"""
+Create and update many snippets in one request.
+
+Used by the `bulk` action of `SnippetViewSet`. New snippets are validated
+together with `SnippetSerializer(many=True)` and inserted with
+`bulk_create`; their highlighting is then fanned out over the highlight
+worker pool. Every item gets its own entry in the results, so one bad
+item doesn't reject the whole import.
+"""
+from django.conf import settings
+from django.db import transaction
+from rest_framework.reverse import reverse
+
+from snippets.highlighting import schedule_highlights
+from snippets.models import Snippet
+from snippets.serializers import SnippetSerializer
+
+
+def max_items():
+    return getattr(settings, 'SNIPPETS_BULK_MAX_ITEMS', 1000)
+
+
+def batch_size():
+    return getattr(settings, 'SNIPPETS_BULK_BATCH_SIZE', 500)
+
+
+def bulk_save(items, owner, context):
+    """
+    Save `items` (a list of snippet dicts) for `owner` and return one result
+    dict per item, in order. Items carrying an `id` update that snippet.
+    """
+    results = [None] * len(items)
+    creates, updates = [], []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors = {'non_field_errors': ['Expected a snippet object.']}
+            results[index] = error(index, errors)
+        elif 'id' in item:
+            updates.append((index, item))
+        else:
+            creates.append((index, item))
+
+    with transaction.atomic():
+        create_snippets(creates, owner, context, results)
+        update_snippets(updates, owner, context, results)
+    return results
+
+
+def error(index, errors):
+    return {'index': index, 'status': 'error', 'errors': errors}
+
+
+def saved(index, status, snippet, request):
+    return {
+        'index': index,
+        'status': status,
+        'id': snippet.pk,
+        'url': reverse('snippet-detail', args=[snippet.pk], request=request),
+        'highlight_status': snippet.highlight_status,
+    }
+
+
+def create_snippets(creates, owner, context, results):
+    if not creates:
+        return
+    serializer = SnippetSerializer(data=[item for _, item in creates],
+                                   many=True, context=context)
+    if not serializer.is_valid():
+        # Report the invalid items and validate the rest again on their own.
+        errors = serializer.errors
+        if isinstance(errors, list):
+            # Older list-based format of ListSerializer errors.
+            errors = dict(enumerate(errors))
+        valid = []
+        for position, (index, item) in enumerate(creates):
+            if errors.get(position):
+                results[index] = error(index, errors[position])
+            else:
+                valid.append((index, item))
+        creates = valid
+        serializer = SnippetSerializer(data=[item for _, item in creates],
+                                       many=True, context=context)
+        serializer.is_valid(raise_exception=True)
+
+    snippets = [Snippet(owner=owner, **attrs) for attrs in serializer.validated_data]
+    pending = [snippet for snippet in snippets if not snippet.prepare_highlighting()]
+    Snippet.objects.bulk_create(snippets, batch_size=batch_size())
+    schedule_highlights([snippet.pk for snippet in pending])
+
+    request = context['request']
+    for (index, _), snippet in zip(creates, snippets):
+        results[index] = saved(index, 'created', snippet, request)
+
+
+def is_valid_id(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def update_snippets(updates, owner, context, results):
+    instances = Snippet.objects.in_bulk([item['id'] for _, item in updates
+                                         if is_valid_id(item['id'])])
+    request = context['request']
+    for index, item in updates:
+        if not is_valid_id(item['id']):
+            results[index] = error(index, {'id': ['Invalid id.']})
+            continue
+        snippet = instances.get(item['id'])
+        if snippet is None:
+            results[index] = error(index, {'id': ['Snippet not found.']})
+            continue
+        if snippet.owner_id != owner.id:
+            results[index] = error(index, {'id': ['You do not own this snippet.']})
+            continue
+        serializer = SnippetSerializer(snippet, data=item, partial=True, context=context)
+        if not serializer.is_valid():
+            results[index] = error(index, serializer.errors)
+            continue
+        serializer.save()
+        results[index] = saved(index, 'updated', snippet, request)
@@ -0,0 +1,203 @@
+"""
+A read-only fast path for list endpoints.
+
+`CompiledSerializer` looks at the fields of a `ModelSerializer` once per
+request and turns them into a plan: which columns to fetch with
+`values_list()`, and how to turn each row tuple into the output dict.
+Hyperlinks are built by splicing the primary key into a URL template that
+was reversed once, instead of calling `reverse()` for every row, and
+to-many hyperlinks are read with one `values_list()` query for the page.
+
+The output matches the stock serializer for plain model fields,
+`ReadOnlyField`s with dotted sources and hyperlinks looked up by primary
+key. Any other field raises `ImproperlyConfigured` when the plan is built.
+
+Viewsets opt in one at a time with `CompiledListMixin`; only the `list`
+action changes. The stock path stays the default, since it is the one that
+runs `to_representation()`, prefetches and any checks made there.
+"""
+from collections import defaultdict
+from operator import itemgetter
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.reverse import reverse
+
+# Stand-in primary key reversed into URL templates and then split out.
+LOOKUP_PLACEHOLDER = '987654321012345678'
+
+# Fields whose to_representation() returns database values unchanged.
+PASSTHROUGH_FIELDS = (
+    serializers.ReadOnlyField,
+    serializers.CharField,
+    serializers.BooleanField,
+    serializers.IntegerField,
+    serializers.ChoiceField,
+)
+
+# Fields that need model instances (or a whole object) to render.
+UNSUPPORTED_FIELDS = (
+    serializers.BaseSerializer,
+    serializers.SerializerMethodField,
+    serializers.RelatedField,
+    serializers.ManyRelatedField,
+)
+
+
+class CompiledSerializer:
+    """
+    Render rows of `serializer.Meta.model` the way `serializer` would.
+
+    `select(queryset)` returns the `values_list()` queryset to paginate and
+    `serialize(rows)` turns those rows into a list of dicts.
+    """
+    def __init__(self, serializer, extra_columns=()):
+        self.serializer = serializer
+        self.model = serializer.Meta.model
+        self.pk_column = self.model._meta.pk.attname
+        self.columns = []
+        self.names = []
+        self.links = []
+        self.converters = []
+        self.related = []
+        self.pk_index = self.column(self.pk_column)
+        for field in serializer._readable_fields:
+            self.compile_field(field)
+        for name in extra_columns:
+            self.column(name)
+        self.project = self.projection()
+
+    def column(self, name):
+        if name not in self.columns:
+            self.columns.append(name)
+        return self.columns.index(name)
+
+    def compile_field(self, field):
+        name = field.field_name
+        if isinstance(field, serializers.HyperlinkedIdentityField):
+            self.check_lookup(field)
+            self.names.append((name, self.pk_index))
+            self.links.append((name, self.pk_index, self.template(field)))
+        elif isinstance(field, serializers.HyperlinkedRelatedField):
+            self.check_lookup(field)
+            index = self.column(self.lookup(field.source))
+            self.names.append((name, index))
+            self.links.append((name, index, self.template(field)))
+        elif isinstance(field, serializers.ManyRelatedField) and isinstance(
+                field.child_relation, serializers.HyperlinkedRelatedField):
+            self.check_lookup(field.child_relation)
+            self.names.append((name, self.pk_index))
+            self.related.append((name, self.lookup(field.source),
+                                 self.template(field.child_relation)))
+        elif field.source == '*' or isinstance(field, UNSUPPORTED_FIELDS):
+            self.unsupported(field)
+        elif isinstance(field, PASSTHROUGH_FIELDS):
+            self.names.append((name, self.column(self.lookup(field.source))))
+        else:
+            index = self.column(self.lookup(field.source))
+            self.names.append((name, index))
+            self.converters.append((name, index, field.to_representation))
+
+    def check_lookup(self, field):
+        if field.lookup_field != 'pk':
+            self.unsupported(field)
+
+    def unsupported(self, field):
+        raise ImproperlyConfigured(
+            f'{type(self.serializer).__name__}.{field.field_name} '
+            f'({type(field).__name__}) cannot be compiled.'
+        )
+
+    def lookup(self, source):
+        """Turn a dotted field source into a `values_list()` lookup."""
+        opts = self.model._meta
+        parts = source.split('.')
+        for field in opts.get_fields():
+            accessor = (field.get_accessor_name()
+                        if field.auto_created and not field.concrete else field.name)
+            if accessor == parts[0]:
+                return '__'.join([field.name] + parts[1:])
+        raise ImproperlyConfigured(f'{opts.label} has no field {parts[0]!r}.')
+
+    def template(self, field):
+        """Reverse `field`'s view once and split it around the lookup value."""
+        context = self.serializer.context
+        format = context.get('format')
+        if format and field.format and field.format != format:
+            format = field.format
+        url = reverse(field.view_name,
+                      kwargs={field.lookup_url_kwarg: LOOKUP_PLACEHOLDER},
+                      request=context.get('request'), format=format)
+        prefix, _, suffix = url.rpartition(LOOKUP_PLACEHOLDER)
+        return prefix, suffix
+
+    def projection(self):
+        indexes = [index for _, index in self.names]
+        if len(indexes) > 1:
+            return itemgetter(*indexes)
+        return lambda row: tuple(row[index] for index in indexes)
+
+    def select(self, queryset):
+        return queryset.prefetch_related(None).values_list(*self.columns, named=True)
+
+    def related_links(self, lookup, template, pks):
+        """Map each primary key to the URLs of its related objects, in order."""
+        opts = self.model._meta
+        related = opts.get_field(lookup.split('__')[0]).related_model
+        ordering = [
+            ('-' if name.startswith('-') else '') + f"{lookup}__{name.lstrip('-')}"
+            for name in related._meta.ordering if isinstance(name, str)
+        ] + [f'{lookup}__pk']
+        pairs = (self.model._default_manager
+                 .filter(pk__in=pks, **{f'{lookup}__isnull': False})
+                 .order_by(*ordering).values_list('pk', f'{lookup}__pk'))
+        prefix, suffix = template
+        links = defaultdict(list)
+        for pk, related_pk in pairs:
+            links[pk].append(f'{prefix}{related_pk}{suffix}')
+        return links
+
+    def serialize(self, rows):
+        rows = list(rows)
+        names = [name for name, _ in self.names]
+        project = self.project
+        items = [dict(zip(names, project(row))) for row in rows]
+
+        for name, index, (prefix, suffix) in self.links:
+            for item, row in zip(items, rows):
+                value = row[index]
+                item[name] = None if value is None else f'{prefix}{value}{suffix}'
+        for name, index, convert in self.converters:
+            for item, row in zip(items, rows):
+                if row[index] is not None:
+                    item[name] = convert(row[index])
+        if self.related and rows:
+            pks = [row[self.pk_index] for row in rows]
+            for name, lookup, template in self.related:
+                links = self.related_links(lookup, template, pks)
+                for item, pk in zip(items, pks):
+                    item[name] = links.get(pk, [])
+        return items
+
+
+class CompiledListMixin:
+    """
+    Serve the `list` action through a `CompiledSerializer` of the viewset's
+    serializer. The paginator's ordering columns are fetched as well, so
+    keyset pagination can read them from the rows.
+    """
+    def list(self, request, *args, **kwargs):
+        ordering = getattr(self.paginator, 'ordering', None) or ()
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        compiled = CompiledSerializer(
+            self.get_serializer(),
+            extra_columns=[name.lstrip('-') for name in ordering],
+        )
+        queryset = compiled.select(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(compiled.serialize(page))
+        return Response(compiled.serialize(queryset))
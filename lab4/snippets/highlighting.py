@@ -0,0 +1,328 @@
+"""
+Pygments rendering for snippets, run off the request thread.
+
+``Snippet.save()`` stores the raw code marked as pending and calls
+``schedule_highlight()``, which renders the HTML in a thread pool once the
+transaction has committed. With ``SNIPPETS_HIGHLIGHT_WORKERS = 0`` the HTML
+is rendered inline instead (used by the tests).
+
+Rendered HTML is also kept in ``html_cache``, an in-process LRU keyed by a
+hash of the highlighted fields, so identical pastes and saves that don't
+touch those fields skip Pygments entirely.
+
+Only the highlighted fragment is stored per snippet. The CSS for each style
+is served once from ``stylesheet()`` and linked from the page built by
+``render_page()``. ``page_variants()`` precomputes the page's ETag and its
+gzip and (if the ``brotli`` package is installed) brotli encodings, which
+are stored next to the fragment.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import escape
+from pygments import highlight
+from pygments.formatters.html import HtmlFormatter
+from pygments.lexers import get_lexer_by_name
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Snippet fields the stored HTML is rendered from. Fragments only carry CSS
+# class names, so the style lives in the stylesheet instead.
+HIGHLIGHT_FIELDS = ('code', 'language', 'linenos')
+# Fields the served page is built from.
+PAGE_FIELDS = HIGHLIGHT_FIELDS + ('title', 'style')
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+  <title>{title}</title>
+  <meta charset="utf-8">
+  <link rel="stylesheet" href="{stylesheet_url}">
+</head>
+<body>
+<h2>{title}</h2>
+
+{body}</body>
+</html>
+"""
+
+
+class RendererPool:
+    """
+    Reusable lexer and formatter pairs, keyed by (language, linenos).
+
+    Looking up a lexer and building a formatter costs more than highlighting
+    a typical snippet, so pairs are kept around. A pair is checked out by one
+    thread at a time; at most ``max_idle`` idle pairs are kept per key and
+    the least recently used keys beyond ``max_keys`` are dropped.
+    """
+
+    def __init__(self, max_keys=64, max_idle=4):
+        self.max_keys = max_keys
+        self.max_idle = max_idle
+        self._idle = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def create(language, linenos):
+        lexer = get_lexer_by_name(language)
+        formatter = HtmlFormatter(linenos='table' if linenos else False)
+        return lexer, formatter
+
+    @contextmanager
+    def checkout(self, language, linenos):
+        key = (language, bool(linenos))
+        with self._lock:
+            idle = self._idle.get(key)
+            pair = idle.pop() if idle else None
+        if pair is None:
+            pair = self.create(language, linenos)
+        yield pair
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            self._idle.move_to_end(key)
+            if len(idle) < self.max_idle:
+                idle.append(pair)
+            while len(self._idle) > self.max_keys:
+                self._idle.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._idle.clear()
+
+
+renderer_pool = RendererPool()
+
+
+def render_html(code, language, linenos):
+    """Return the highlighted HTML fragment for the given snippet fields."""
+    with renderer_pool.checkout(language, linenos) as (lexer, formatter):
+        return highlight(code, lexer, formatter)
+
+
+@lru_cache(maxsize=None)
+def stylesheet(style):
+    """Return the CSS for ``style``, shared by every highlighted fragment."""
+    return HtmlFormatter(style=style).get_style_defs('.highlight') + '\n'
+
+
+def stylesheet_version(style):
+    """Short digest of ``stylesheet(style)``, used to bust long-lived caches."""
+    return hashlib.sha256(stylesheet(style).encode()).hexdigest()[:12]
+
+
+def is_full_document(html):
+    """True for HTML stored before fragments, which embeds its own CSS."""
+    return html.startswith('<!DOCTYPE')
+
+
+def extract_fragment(html):
+    """
+    Return the highlighted fragment of a full document rendered by Pygments,
+    or None if ``html`` doesn't look like one.
+    """
+    if not is_full_document(html):
+        return None
+    start = html.find('</h2>\n\n', html.find('<body>'))
+    end = html.rfind('</body>')
+    if start == -1 or end < start:
+        return None
+    return html[start + len('</h2>\n\n'):end]
+
+
+def stylesheet_url(style):
+    url = reverse('snippet-stylesheet', kwargs={'style': style, 'format': 'css'})
+    return url + '?v=' + stylesheet_version(style)
+
+
+def render_page(fragment, title, stylesheet_url):
+    """Wrap a stored fragment in a page that links the style's stylesheet."""
+    return PAGE_TEMPLATE.format(
+        title=escape(title), stylesheet_url=escape(stylesheet_url), body=fragment
+    )
+
+
+def build_page(html, title, style):
+    """Return the page served for stored ``html`` (fragment or full document)."""
+    if is_full_document(html):
+        return html
+    return render_page(html, title, stylesheet_url(style))
+
+
+def page_variants(html, title, style):
+    """
+    Return the stored representations of the page for ``html``: its content
+    hash, used as the ETag, and its gzip and brotli encodings.
+    """
+    page = build_page(html, title, style).encode()
+    return {
+        'content_hash': hashlib.sha256(page).hexdigest(),
+        'highlighted_gzip': gzip.compress(page, compresslevel=9, mtime=0),
+        'highlighted_br': brotli.compress(page, quality=11) if brotli else None,
+    }
+
+
+def cache_key(code, language, linenos):
+    """Content address of the HTML rendered for the given fields."""
+    payload = json.dumps([code, language, bool(linenos)])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class HighlightCache:
+    """
+    Thread-safe LRU of rendered HTML, bounded by the total size in bytes.
+
+    The limit is read from ``SNIPPETS_HIGHLIGHT_CACHE_BYTES`` unless given
+    explicitly; a limit of 0 disables the cache.
+    """
+
+    def __init__(self, max_bytes=None):
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def max_bytes(self):
+        if self._max_bytes is not None:
+            return self._max_bytes
+        return getattr(settings, 'SNIPPETS_HIGHLIGHT_CACHE_BYTES', 16 * 1024 * 1024)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def size(self):
+        return self._size
+
+    def get(self, key):
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+            return html
+
+    def set(self, key, html):
+        cost = len(html.encode())
+        limit = self.max_bytes
+        if cost > limit:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old.encode())
+            self._entries[key] = html
+            self._size += cost
+            while self._size > limit:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted.encode())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+html_cache = HighlightCache()
+
+
+def cached_html(code, language, linenos):
+    """Return previously rendered HTML for these fields, or None."""
+    return html_cache.get(cache_key(code, language, linenos))
+
+
+def render_cached(code, language, linenos):
+    """Like ``render_html()``, but served from and stored in ``html_cache``."""
+    key = cache_key(code, language, linenos)
+    html = html_cache.get(key)
+    if html is None:
+        html = render_html(code, language, linenos)
+        html_cache.set(key, html)
+    return html
+
+
+def worker_count():
+    return getattr(settings, 'SNIPPETS_HIGHLIGHT_WORKERS', 2)
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=worker_count(), thread_name_prefix='highlight'
+            )
+        return _executor
+
+
+def highlight_snippet(pk):
+    """
+    Render a stored snippet and save the HTML.
+
+    The row is only updated if the highlighted fields still hold the values
+    that were rendered, so a slow job never overwrites a newer edit.
+    """
+    from snippets.models import Snippet
+
+    snippet = Snippet.objects.filter(pk=pk).first()
+    if snippet is None:
+        return
+    fields = {name: getattr(snippet, name) for name in PAGE_FIELDS}
+    try:
+        html = render_cached(*(fields[name] for name in HIGHLIGHT_FIELDS))
+    except Exception:
+        logger.exception('Highlighting snippet %s failed', pk)
+        Snippet.objects.filter(pk=pk, **fields).update(
+            highlight_status=Snippet.HighlightStatus.FAILED
+        )
+        return
+    Snippet.objects.filter(pk=pk, **fields).update(
+        highlighted=html, highlight_status=Snippet.HighlightStatus.READY,
+        modified=timezone.now(), **page_variants(html, snippet.title, snippet.style)
+    )
+
+
+def _run_job(pk):
+    # Worker threads own their DB connections, like request threads do.
+    close_old_connections()
+    try:
+        highlight_snippet(pk)
+    finally:
+        close_old_connections()
+
+
+def schedule_highlight(pk):
+    """Queue rendering of a saved snippet for after the commit."""
+    schedule_highlights([pk])
+
+
+def schedule_highlights(pks):
+    """Queue rendering of many saved snippets, spread over the worker pool."""
+    if not pks:
+        return
+    executor = get_executor()
+
+    def submit():
+        for pk in pks:
+            executor.submit(_run_job, pk)
+
+    transaction.on_commit(submit)
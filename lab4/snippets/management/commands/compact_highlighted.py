@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+
+from snippets.highlighting import extract_fragment
+from snippets.models import Snippet
+
+
+class Command(BaseCommand):
+    help = ('Replace full HTML documents stored in Snippet.highlighted with the '
+            'highlighted fragment, rebuild the stored page variants and report '
+            'the bytes saved.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only report what would be saved.')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        rows = before = after = 0
+        batch = []
+        snippets = (Snippet.objects.filter(highlighted__startswith='<!DOCTYPE')
+                    .only('pk', 'highlighted', 'title', 'style'))
+        for snippet in snippets.iterator(chunk_size=options['batch_size']):
+            fragment = extract_fragment(snippet.highlighted)
+            if fragment is None:
+                continue
+            rows += 1
+            before += len(snippet.highlighted.encode())
+            after += len(fragment.encode())
+            snippet.highlighted = fragment
+            # The ETag and encodings were made from the old document.
+            snippet.set_page_variants()
+            batch.append(snippet)
+            if len(batch) >= options['batch_size']:
+                self.write(batch, options['dry_run'])
+                batch = []
+        self.write(batch, options['dry_run'])
+
+        saved = before - after
+        percent = 100 * saved / before if before else 0
+        verb = 'Would compact' if options['dry_run'] else 'Compacted'
+        self.stdout.write(f'{verb} {rows} snippets: {before} -> {after} bytes, '
+                          f'saved {saved} bytes ({percent:.1f}%).')
+
+    def write(self, batch, dry_run):
+        if batch and not dry_run:
+            Snippet.objects.bulk_update(batch, [
+                'highlighted', 'content_hash', 'highlighted_gzip', 'highlighted_br',
+            ])
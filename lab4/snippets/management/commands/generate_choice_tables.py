@@ -0,0 +1,32 @@
+from pathlib import Path
+
+import pygments
+from django.core.management.base import BaseCommand
+
+from snippets.models import registry_language_choices, registry_style_choices
+
+TEMPLATE = '''\
+# Generated by `python manage.py generate_choice_tables`; do not edit.
+# Run the command again after upgrading Pygments.
+PYGMENTS_VERSION = {version!r}
+
+LANGUAGE_CHOICES = [
+{languages}]
+
+STYLE_CHOICES = [
+{styles}]
+'''
+
+
+class Command(BaseCommand):
+    help = ('Write the lexer and style choice tables of Snippet to '
+            'snippets/choice_tables.py from the installed Pygments.')
+
+    def handle(self, *args, **options):
+        path = Path(__file__).resolve().parents[2] / 'choice_tables.py'
+        path.write_text(TEMPLATE.format(
+            version=pygments.__version__,
+            languages=''.join(f'    {item!r},\n' for item in registry_language_choices()),
+            styles=''.join(f'    {item!r},\n' for item in registry_style_choices()),
+        ))
+        self.stdout.write(f'Wrote {path.name} for Pygments {pygments.__version__}.')
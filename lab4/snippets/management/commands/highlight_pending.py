@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from snippets.highlighting import highlight_snippet
+from snippets.models import Snippet
+
+
+class Command(BaseCommand):
+    help = 'Render snippets whose highlighting is pending, e.g. after a restart.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--failed', action='store_true',
+                            help='Also retry snippets whose highlighting failed.')
+
+    def handle(self, *args, **options):
+        statuses = [Snippet.HighlightStatus.PENDING]
+        if options['failed']:
+            statuses.append(Snippet.HighlightStatus.FAILED)
+        pks = list(Snippet.objects.filter(highlight_status__in=statuses)
+                   .values_list('pk', flat=True))
+        for pk in pks:
+            highlight_snippet(pk)
+        self.stdout.write(f'Rendered {len(pks)} snippets.')
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from snippets import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of snippets from the snippets table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--optimize', action='store_true',
+                            help='Also merge the index b-trees afterwards.')
+
+    def handle(self, *args, **options):
+        if not search.is_available():
+            raise CommandError('Full-text search needs SQLite with FTS5.')
+        search.rebuild()
+        if options['optimize']:
+            search.optimize()
+        self.stdout.write('Rebuilt the snippet search index.')
@@ -0,0 +1,48 @@
+from django.db import migrations
+
+BATCH_SIZE = 500
+
+
+def extract_fragment(html):
+    # Frozen copy of snippets.highlighting.extract_fragment().
+    if not html.startswith('<!DOCTYPE'):
+        return None
+    start = html.find('</h2>\n\n', html.find('<body>'))
+    end = html.rfind('</body>')
+    if start == -1 or end < start:
+        return None
+    return html[start + len('</h2>\n\n'):end]
+
+
+def compact_highlighted(apps, schema_editor):
+    """Keep only the highlighted fragment; the CSS is now served per style."""
+    Snippet = apps.get_model('snippets', 'Snippet')
+    rows = saved = 0
+    batch = []
+    snippets = (Snippet.objects.filter(highlighted__startswith='<!DOCTYPE')
+                .only('pk', 'highlighted'))
+    for snippet in snippets.iterator(chunk_size=BATCH_SIZE):
+        fragment = extract_fragment(snippet.highlighted)
+        if fragment is None:
+            continue
+        rows += 1
+        saved += len(snippet.highlighted.encode()) - len(fragment.encode())
+        snippet.highlighted = fragment
+        batch.append(snippet)
+        if len(batch) >= BATCH_SIZE:
+            Snippet.objects.bulk_update(batch, ['highlighted'])
+            batch = []
+    Snippet.objects.bulk_update(batch, ['highlighted'])
+    if rows:
+        print(f'\n  Compacted {rows} highlighted snippets, saved {saved} bytes.')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snippets', '0005_lazy_choices'),
+    ]
+
+    operations = [
+        migrations.RunPython(compact_highlighted, migrations.RunPython.noop),
+    ]
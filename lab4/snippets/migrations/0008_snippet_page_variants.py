@@ -0,0 +1,35 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snippets', '0007_snippet_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='snippet',
+            name='modified',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        # Existing rows get their hash and encodings the first time they are
+        # served (see Snippet.backfill_page_variants).
+        migrations.AddField(
+            model_name='snippet',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='snippet',
+            name='highlighted_gzip',
+            field=models.BinaryField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='snippet',
+            name='highlighted_br',
+            field=models.BinaryField(editable=False, null=True),
+        ),
+    ]
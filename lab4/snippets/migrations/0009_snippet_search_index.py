@@ -0,0 +1,71 @@
+from django.db import migrations
+
+# External-content FTS5 index over snippet titles and code, kept in sync by
+# triggers. Only SQLite has FTS5; on other backends the search endpoint
+# reports that search is unavailable.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE snippets_snippet_fts USING fts5(
+        title, code, content='snippets_snippet', content_rowid='id',
+        tokenize='unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER snippets_snippet_fts_insert AFTER INSERT ON snippets_snippet
+    BEGIN
+        INSERT INTO snippets_snippet_fts(rowid, title, code)
+        VALUES (new.id, new.title, new.code);
+    END
+    """,
+    """
+    CREATE TRIGGER snippets_snippet_fts_delete AFTER DELETE ON snippets_snippet
+    BEGIN
+        INSERT INTO snippets_snippet_fts(snippets_snippet_fts, rowid, title, code)
+        VALUES ('delete', old.id, old.title, old.code);
+    END
+    """,
+    # Only edits of the indexed columns touch the index, not highlighting.
+    """
+    CREATE TRIGGER snippets_snippet_fts_update AFTER UPDATE OF title, code
+    ON snippets_snippet
+    BEGIN
+        INSERT INTO snippets_snippet_fts(snippets_snippet_fts, rowid, title, code)
+        VALUES ('delete', old.id, old.title, old.code);
+        INSERT INTO snippets_snippet_fts(rowid, title, code)
+        VALUES (new.id, new.title, new.code);
+    END
+    """,
+    "INSERT INTO snippets_snippet_fts(snippets_snippet_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS snippets_snippet_fts_update',
+    'DROP TRIGGER IF EXISTS snippets_snippet_fts_delete',
+    'DROP TRIGGER IF EXISTS snippets_snippet_fts_insert',
+    'DROP TABLE IF EXISTS snippets_snippet_fts',
+]
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('snippets', '0008_snippet_page_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
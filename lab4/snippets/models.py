@@ -1,36 +1,243 @@
+from functools import cache
+
 from django.db import models
-from pygments.lexers import get_all_lexers, get_lexer_by_name
-from pygments.styles import get_all_styles
-from pygments.formatters.html import HtmlFormatter
-from pygments import highlight
+from snippets.highlighting import (
+    HIGHLIGHT_FIELDS, PAGE_FIELDS, cached_html, page_variants, render_cached,
+    schedule_highlight, worker_count,
+)
+
+
+# Walking the Pygments registry loads every plugin entry point, and Django's
+# system checks read the choices of every field, so the tables are read from
+# the generated `snippets.choice_tables` module. The registry is only walked
+# when that module is missing or was generated for another Pygments version.
+def registry_language_choices():
+    from pygments.lexers import get_all_lexers
+
+    return sorted((item[1][0], item[0]) for item in get_all_lexers() if item[1])
+
+
+def registry_style_choices():
+    from pygments.styles import get_all_styles
+
+    return sorted((item, item) for item in get_all_styles())
+
+
+def generated_tables():
+    """The generated choice tables module, or None if it is missing or stale."""
+    import pygments
+
+    try:
+        from snippets import choice_tables
+    except ImportError:
+        return None
+    if choice_tables.PYGMENTS_VERSION != pygments.__version__:
+        return None
+    return choice_tables
 
-LEXERS = [item for item in get_all_lexers() if item[1]]
-LANGUAGE_CHOICES = sorted([(item[1][0], item[0]) for item in LEXERS])
-STYLE_CHOICES = sorted([(item, item) for item in get_all_styles()])
+
+@cache
+def language_choices():
+    tables = generated_tables()
+    if tables is None:
+        return registry_language_choices()
+    return list(tables.LANGUAGE_CHOICES)
+
+
+@cache
+def style_choices():
+    tables = generated_tables()
+    if tables is None:
+        return registry_style_choices()
+    return list(tables.STYLE_CHOICES)
+
+
+def __getattr__(name):
+    # Keep the old module-level tables importable.
+    if name == 'LANGUAGE_CHOICES':
+        return language_choices()
+    if name == 'STYLE_CHOICES':
+        return style_choices()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
 class Snippet(models.Model):
+    class HighlightStatus(models.TextChoices):
+        PENDING = 'pending'
+        READY = 'ready'
+        FAILED = 'failed'
+
     created = models.DateTimeField(auto_now_add=True)
     title = models.CharField(max_length=100, blank=True, default='')
     code = models.TextField()
     linenos = models.BooleanField(default=False)
-    language = models.CharField(choices=LANGUAGE_CHOICES, default='python', max_length=100)
-    style = models.CharField(choices=STYLE_CHOICES, default='friendly', max_length=100)
+    language = models.CharField(choices=language_choices, default='python', max_length=100)
+    style = models.CharField(choices=style_choices, default='friendly', max_length=100)
     owner = models.ForeignKey('auth.User', related_name='snippets', on_delete=models.CASCADE)
     highlighted = models.TextField()
+    highlight_status = models.CharField(
+        choices=HighlightStatus.choices, default=HighlightStatus.PENDING, max_length=10
+    )
+    modified = models.DateTimeField(auto_now=True)
+    # Validator and precompressed encodings of the page served by the
+    # `highlight` action, filled in together with `highlighted`.
+    content_hash = models.CharField(max_length=64, blank=True, default='', editable=False)
+    highlighted_gzip = models.BinaryField(null=True, editable=False)
+    highlighted_br = models.BinaryField(null=True, editable=False)
+
+    # Written whenever the highlighting is (re)done.
+    RENDERED_FIELDS = ('highlighted', 'highlight_status', 'content_hash',
+                       'highlighted_gzip', 'highlighted_br')
 
     class Meta:
         ordering = ['created']
+        indexes = [
+            # Keyset pagination seeks on (created, id); see snippets.pagination.
+            models.Index(fields=['created', 'id'], name='snippet_created_id_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.take_snapshot()
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using, fields, from_queryset)
+        if fields is None:
+            self.take_snapshot()
+        else:
+            # Other columns may hold changes that haven't been saved yet.
+            self.take_snapshot([field.attname for field in self._meta.concrete_fields
+                                if field.name in fields or field.attname in fields])
+
+    def take_snapshot(self, attnames=None):
+        """
+        Remember the loaded column values, to tell later which ones changed.
+        With `attnames`, only those columns are remembered again.
+        """
+        if attnames is None or not hasattr(self, '_snapshot'):
+            self._snapshot = {}
+        for field in self._meta.concrete_fields:
+            if field.attname in self.__dict__ and (
+                    attnames is None or field.attname in attnames):
+                self._snapshot[field.attname] = getattr(self, field.attname)
+
+    def changed_fields(self):
+        """
+        Names of the fields changed since the row was loaded or saved, or None
+        for a snippet that doesn't come from the database. A field assigned
+        without having been loaded counts as changed.
+        """
+        snapshot = getattr(self, '_snapshot', None)
+        if snapshot is None or self._state.adding:
+            return None
+        return {
+            field.name for field in self._meta.concrete_fields
+            if field.attname in self.__dict__ and (
+                field.attname not in snapshot
+                or self.__dict__[field.attname] != snapshot[field.attname]
+            )
+        }
+
+    def loaded_fields(self):
+        """Names of the non-primary-key fields loaded from the database."""
+        return {
+            self._meta.get_field(attname).name for attname in self._snapshot
+            if attname != self._meta.pk.attname
+        }
 
     def save(self, *args, **kwargs):
         """
         Use the `pygments` library to create a highlighted HTML
         representation of the code snippet.
+
+        The raw code is saved straight away and the HTML is rendered by
+        a background worker (see `snippets.highlighting`), unless the same
+        fields have been rendered before and the HTML is still cached.
+
+        Saving a loaded snippet only writes the changed columns, and only
+        re-highlights when one of the highlighted fields changed. It writes
+        nothing at all only when every field it would save was loaded and
+        is unchanged.
         """
-        lexer = get_lexer_by_name(self.language)
-        linenos = 'table' if self.linenos else False
-        options = {'title': self.title} if self.title else {}
-        formatter = HtmlFormatter(style=self.style, linenos=linenos,
-                                full=True, **options)
-        self.highlighted = highlight(self.code, lexer, formatter)
+        changed = self.changed_fields()
+        update_fields = kwargs.get('update_fields')
+        if changed is None:
+            if update_fields is not None:
+                kwargs['update_fields'] = {
+                    *update_fields, 'modified', *self.RENDERED_FIELDS
+                }
+            ready = self.prepare_highlighting()
+        else:
+            names = {field.name for field in self._meta.concrete_fields
+                     if not field.primary_key}
+            if update_fields is not None:
+                names &= {self._meta.get_field(name).name for name in update_fields}
+                changed &= names
+            if not changed:
+                if names <= self.loaded_fields():
+                    return
+                # Some fields were never loaded, so nothing is known to be
+                # unchanged: save the loaded ones, as Model.save() would.
+                changed = names & self.loaded_fields()
+            ready, rendered = self.update_highlighting(changed)
+            kwargs['update_fields'] = changed | rendered | {'modified'}
         super().save(*args, **kwargs)
+        self.take_snapshot()
+        if not ready:
+            schedule_highlight(self.pk)
+
+    def update_highlighting(self, changed):
+        """
+        Redo only the highlighting work that `changed` fields invalidate and
+        return whether it is ready, and the names of the fields it rewrote.
+        """
+        if changed & set(HIGHLIGHT_FIELDS):
+            return self.prepare_highlighting(), set(self.RENDERED_FIELDS)
+        if changed & set(PAGE_FIELDS):
+            if self.is_highlighted:
+                self.set_page_variants()
+                return True, {'content_hash', 'highlighted_gzip', 'highlighted_br'}
+            # A queued job won't write over a changed title or style either.
+            return False, set()
+        return True, set()
+
+    def prepare_highlighting(self):
+        """
+        Fill in the highlighting from the cache, or render it inline when
+        there are no workers. Otherwise mark it pending and return False;
+        the caller queues the row once it has a primary key.
+        """
+        fields = [getattr(self, name) for name in HIGHLIGHT_FIELDS]
+        html = cached_html(*fields)
+        if html is None and worker_count() == 0:
+            html = render_cached(*fields)
+        if html is not None:
+            self.highlighted = html
+            self.highlight_status = self.HighlightStatus.READY
+            self.set_page_variants()
+            return True
+        self.highlight_status = self.HighlightStatus.PENDING
+        self.content_hash = ''
+        self.highlighted_gzip = self.highlighted_br = None
+        return False
+
+    def set_page_variants(self):
+        variants = page_variants(self.highlighted, self.title, self.style)
+        for name, value in variants.items():
+            setattr(self, name, value)
+
+    def backfill_page_variants(self):
+        """Store the page variants of a row highlighted before they existed."""
+        self.set_page_variants()
+        current = {name: getattr(self, name) for name in PAGE_FIELDS}
+        Snippet.objects.filter(pk=self.pk, **current).update(
+            content_hash=self.content_hash,
+            highlighted_gzip=self.highlighted_gzip,
+            highlighted_br=self.highlighted_br,
+        )
+
+    @property
+    def is_highlighted(self):
+        return self.highlight_status == self.HighlightStatus.READY
@@ -13,4 +13,5 @@ class IsOwnerOrReadOnly(permissions.BasePermission):
             return True
 
         # Write permissions are only allowed to the owner of the snippet.
-        return obj.owner == request.user
\ No newline at end of file
+        # Compare ids so the owner row is never fetched.
+        return obj.owner_id == request.user.id
\ No newline at end of file
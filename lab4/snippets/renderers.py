@@ -0,0 +1,11 @@
+from rest_framework import renderers
+
+
+class StylesheetRenderer(renderers.BaseRenderer):
+    """Pass a CSS string straight through, like `StaticHTMLRenderer` does for HTML."""
+    media_type = 'text/css'
+    format = 'css'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
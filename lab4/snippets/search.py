@@ -0,0 +1,120 @@
+"""
+Full-text search over snippet titles and code.
+
+Backed by the ``snippets_snippet_fts`` FTS5 table (migration 0009), which
+triggers keep in sync with ``snippets_snippet``. Results are ranked with
+BM25, a title match weighing five times a code match.
+"""
+import re
+
+from django.db import OperationalError, connection
+
+TABLE = 'snippets_snippet_fts'
+
+# bm25() weights of the (title, code) columns.
+RANKING = 'bm25(5.0, 1.0)'
+
+# Control characters can't occur in the indexed text, so they mark matches.
+MARK_START, MARK_END = '\x02', '\x03'
+
+# Rank first and only mark up the winning rows: highlight() reads the whole
+# code of a row, which is too slow to run on every match of a common word.
+RANK_SQL = f"""
+    SELECT {TABLE}.rowid, {TABLE}.rank FROM {TABLE} {{join}}
+    WHERE {TABLE} MATCH %s AND {TABLE}.rank MATCH '{RANKING}'
+    ORDER BY {TABLE}.rank
+    LIMIT %s
+"""
+LANGUAGE_JOIN = f'JOIN snippets_snippet s ON s.id = {TABLE}.rowid AND s.language = %s'
+MARKUP_SQL = f"""
+    SELECT s.id, s.title, s.language,
+           highlight({TABLE}, 1, '{MARK_START}', '{MARK_END}')
+    FROM {TABLE} JOIN snippets_snippet s ON s.id = {TABLE}.rowid
+    WHERE {TABLE} MATCH %s AND {TABLE}.rowid IN ({{ids}})
+"""
+
+re_term = re.compile(r'\w+')
+
+
+class SearchUnavailable(Exception):
+    pass
+
+
+def is_available():
+    return connection.vendor == 'sqlite'
+
+
+def build_query(text):
+    """
+    Turn free text into an FTS5 query matching all of its words, the last
+    one as a prefix. Quoting every word keeps FTS5 syntax out of user input.
+    """
+    terms = re_term.findall(text)
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def matching_lines(marked, limit):
+    """Return up to ``limit`` (line number, text) pairs containing a match."""
+    lines = []
+    for number, line in enumerate(marked.splitlines(), start=1):
+        if MARK_START in line:
+            lines.append((number, line.replace(MARK_START, '').replace(MARK_END, '')))
+            if len(lines) == limit:
+                break
+    return lines
+
+
+def search(text, language=None, limit=20, max_lines=3):
+    """
+    Return ranked matches for ``text`` as dicts with the snippet's id, title,
+    language, rank (lower is better) and its first matching code lines.
+    """
+    if not is_available():
+        raise SearchUnavailable('Full-text search needs SQLite with FTS5.')
+    query = build_query(text)
+    if query is None:
+        return []
+    join, params = '', [query, limit]
+    if language:
+        join, params = LANGUAGE_JOIN, [language, query, limit]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(RANK_SQL.format(join=join), params)
+            ranks = dict(cursor.fetchall())
+            if not ranks:
+                return []
+            ids = ', '.join(['%s'] * len(ranks))
+            cursor.execute(MARKUP_SQL.format(ids=ids), [query, *ranks])
+            rows = cursor.fetchall()
+    except OperationalError as exc:
+        if TABLE in str(exc):
+            raise SearchUnavailable('The search index has not been created.') from exc
+        raise
+    results = [
+        {
+            'id': pk,
+            'title': title,
+            'language': language,
+            'rank': ranks[pk],
+            'lines': matching_lines(marked, max_lines),
+        }
+        for pk, title, language, marked in rows
+    ]
+    results.sort(key=lambda result: result['rank'])
+    return results
+
+
+def rebuild():
+    """Rebuild the index from the snippets table."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {TABLE}({TABLE}) VALUES ('rebuild')")
+
+
+def optimize():
+    """Merge the index b-trees, which speeds up queries after heavy writes."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {TABLE}({TABLE}) VALUES ('optimize')")
@@ -1,9 +1,72 @@
-from rest_framework import serializers
-from snippets.models import Snippet, LANGUAGE_CHOICES, STYLE_CHOICES
+from rest_framework import permissions, serializers
+from snippets.models import Snippet
 from django.contrib.auth.models import User
+from django.core.exceptions import FieldDoesNotExist
 
 
-class SnippetSerializer(serializers.HyperlinkedModelSerializer):
+class SparseFieldsetsMixin:
+    """
+    Let clients choose fields with `?fields=a,b` or drop them with `?omit=c`
+    on read requests.
+
+    Fields named in `Meta.list_omit` are never rendered by the `list` action.
+    `narrow_queryset()` restricts the SQL columns to the remaining fields.
+    """
+    fields_query_param = 'fields'
+    omit_query_param = 'omit'
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method not in permissions.SAFE_METHODS:
+            return fields
+        omit = set(self.get_query_list(request, self.omit_query_param))
+        view = self.context.get('view')
+        if getattr(view, 'action', None) == 'list':
+            omit.update(getattr(self.Meta, 'list_omit', ()))
+        only = self.get_query_list(request, self.fields_query_param)
+        return {
+            name: field for name, field in fields.items()
+            if name not in omit and (not only or name in only)
+        }
+
+    @staticmethod
+    def get_query_list(request, param):
+        value = request.query_params.get(param, '')
+        return [name.strip() for name in value.split(',') if name.strip()]
+
+    def narrow_queryset(self, queryset):
+        """
+        Load only the columns the selected fields read, joining `a.b` sources.
+
+        Ordering columns are kept as well, since cursor pagination reads them.
+        """
+        opts = queryset.model._meta
+        ordering = queryset.query.order_by or opts.ordering
+        columns = {opts.pk.name}
+        columns.update(name.lstrip('-') for name in ordering
+                       if isinstance(name, str) and name != '?')
+        related = set()
+        for field in self.fields.values():
+            if field.source == '*':
+                continue
+            name, _, rest = field.source.partition('.')
+            try:
+                model_field = opts.get_field(name)
+            except FieldDoesNotExist:
+                # A property or method may read any column.
+                return queryset
+            if rest and model_field.many_to_one:
+                related.add(name)
+                columns.add(f"{name}__{rest.replace('.', '__')}")
+            elif model_field.concrete and not model_field.many_to_many:
+                columns.add(name)
+            elif not model_field.is_relation:
+                return queryset
+        return queryset.select_related(*related).only(*columns)
+
+
+class SnippetSerializer(SparseFieldsetsMixin, serializers.HyperlinkedModelSerializer):
     owner = serializers.ReadOnlyField(source='owner.username')
     highlight = serializers.HyperlinkedIdentityField(view_name='snippet-highlight', format='html')
 
@@ -11,6 +74,8 @@ class SnippetSerializer(serializers.HyperlinkedModelSerializer):
         model = Snippet
         fields = ['url', 'id', 'highlight', 'owner',
                   'title', 'code', 'linenos', 'language', 'style']
+        # Lists link to the detail view for the code itself.
+        list_omit = ['code']
 
 
 class UserSerializer(serializers.HyperlinkedModelSerializer):
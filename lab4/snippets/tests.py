@@ -1,3 +1,656 @@
-from django.test import TestCase
+import base64
+import gzip
+from io import StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core import checks
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers, viewsets
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from snippets import highlighting, models
+from snippets.compiled import CompiledSerializer
+from snippets.highlighting import (
+    HighlightCache, RendererPool, highlight_snippet, html_cache,
+)
+from snippets.models import Snippet
+from snippets.permissions import IsOwnerOrReadOnly
+from snippets.serializers import SnippetSerializer, UserSerializer
+from snippets.views import (
+    SnippetViewSet, UserViewSet, accepted_encodings, accepts_encoding,
+)
+
+
+class ImmediateExecutor:
+    """Stand-in for the highlight thread pool that runs jobs inline."""
+
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+@override_settings(SNIPPETS_HIGHLIGHT_WORKERS=0)
+class SnippetTestCase(TestCase):
+    def setUp(self):
+        html_cache.clear()
+        self.user = User.objects.create_user('alice')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_snippet(self, **fields):
+        fields.setdefault('code', 'print("hello")\n')
+        return Snippet.objects.create(owner=self.user, **fields)
+
+
+class HighlightPipelineTests(SnippetTestCase):
+    def test_inline_rendering(self):
+        snippet = self.create_snippet()
+        self.assertTrue(snippet.is_highlighted)
+        self.assertIn('<span', snippet.highlighted)
+
+    @override_settings(SNIPPETS_HIGHLIGHT_WORKERS=2)
+    def test_save_marks_pending_and_serves_fallback(self):
+        snippet = self.create_snippet(code='x = 1 < 2\n')
+        snippet.refresh_from_db()
+        self.assertEqual(snippet.highlight_status, Snippet.HighlightStatus.PENDING)
+        response = self.client.get(f'/api/snippets/{snippet.pk}/highlight/')
+        self.assertEqual(response['X-Highlight-Status'], 'pending')
+        self.assertContains(response, '<pre>x = 1 &lt; 2\n</pre>')
+
+        highlight_snippet(snippet.pk)
+        response = self.client.get(f'/api/snippets/{snippet.pk}/highlight/')
+        self.assertNotIn('X-Highlight-Status', response)
+        self.assertContains(response, 'class="highlight"')
+
+    @override_settings(SNIPPETS_HIGHLIGHT_WORKERS=2)
+    def test_worker_runs_after_commit(self):
+        executor = ImmediateExecutor()
+        with mock.patch('snippets.highlighting.get_executor', return_value=executor):
+            with self.captureOnCommitCallbacks(execute=True):
+                snippet = self.create_snippet()
+        snippet.refresh_from_db()
+        self.assertTrue(snippet.is_highlighted)
+
+
+class HighlightCacheTests(SnippetTestCase):
+    def test_identical_paste_skips_pygments(self):
+        first = self.create_snippet(code='a = 1\n')
+        with mock.patch('snippets.highlighting.render_html') as render:
+            second = self.create_snippet(code='a = 1\n')
+            first.owner = User.objects.create_user('bob')
+            first.save()
+        render.assert_not_called()
+        self.assertEqual(second.highlighted, first.highlighted)
+
+    @override_settings(SNIPPETS_HIGHLIGHT_WORKERS=2)
+    def test_cache_hit_is_ready_without_worker(self):
+        first = self.create_snippet(code='b = 2\n', linenos=True)
+        highlight_snippet(first.pk)
+        with mock.patch('snippets.models.schedule_highlight') as schedule:
+            snippet = self.create_snippet(code='b = 2\n', linenos=True)
+        schedule.assert_not_called()
+        self.assertTrue(snippet.is_highlighted)
+
+    def test_changed_fields_miss(self):
+        first = self.create_snippet(code='c = 3\n')
+        second = self.create_snippet(code='c = 3\n', linenos=True)
+        self.assertNotEqual(first.highlighted, second.highlighted)
+        with mock.patch('snippets.highlighting.render_html') as render:
+            third = self.create_snippet(code='c = 3\n', style='monokai')
+        render.assert_not_called()
+        self.assertEqual(third.highlighted, first.highlighted)
+
+    def test_lru_eviction_by_size(self):
+        cache = HighlightCache(max_bytes=10)
+        cache.set('a', 'xxxx')
+        cache.set('b', 'yyyy')
+        cache.get('a')
+        cache.set('c', 'zzzz')
+        self.assertEqual(cache.get('b'), None)
+        self.assertEqual(cache.get('a'), 'xxxx')
+        self.assertEqual(cache.size, 8)
+        cache.set('big', 'x' * 11)
+        self.assertEqual(len(cache), 2)
+
+
+class RendererPoolTests(SnippetTestCase):
+    def test_pairs_are_reused_but_never_shared(self):
+        pool = RendererPool(max_keys=1, max_idle=1)
+        with pool.checkout('python', False) as first:
+            with pool.checkout('python', False) as second:
+                self.assertIsNot(first, second)
+        with pool.checkout('python', False) as third:
+            self.assertIn(third, (first, second))
+        with pool.checkout('sql', True):
+            pass
+        with pool.checkout('python', False) as fourth:
+            self.assertNotIn(fourth, (first, second))
+
+
+class ChoiceTableTests(SnippetTestCase):
+    def test_module_tables_still_importable(self):
+        from snippets.models import LANGUAGE_CHOICES, STYLE_CHOICES
+
+        self.assertIn(('python', 'Python'), LANGUAGE_CHOICES)
+        self.assertIn(('friendly', 'friendly'), STYLE_CHOICES)
+
+    def test_generated_tables_match_registry(self):
+        from snippets import choice_tables
+
+        # Fails after a Pygments upgrade until generate_choice_tables is run.
+        self.assertEqual(choice_tables.LANGUAGE_CHOICES,
+                         models.registry_language_choices())
+        self.assertEqual(choice_tables.STYLE_CHOICES, models.registry_style_choices())
+
+    def test_system_checks_do_not_walk_registry(self):
+        models.language_choices.cache_clear()
+        models.style_choices.cache_clear()
+        self.addCleanup(models.language_choices.cache_clear)
+        self.addCleanup(models.style_choices.cache_clear)
+        with mock.patch('snippets.models.registry_language_choices') as languages, \
+                mock.patch('snippets.models.registry_style_choices') as styles:
+            self.assertEqual(checks.run_checks(), [])
+        languages.assert_not_called()
+        styles.assert_not_called()
+
+    def test_stale_tables_are_ignored(self):
+        with mock.patch('snippets.choice_tables.PYGMENTS_VERSION', '0.0'):
+            self.assertIsNone(models.generated_tables())
+        self.assertIsNotNone(models.generated_tables())
+
+    def test_api_validates_against_lazy_choices(self):
+        response = self.client.post('/api/snippets/', {'code': 'x', 'language': 'nope'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('language', response.data)
+
+
+class StylesheetTests(SnippetTestCase):
+    def test_highlight_links_shared_stylesheet(self):
+        snippet = self.create_snippet(title='Demo <1>', style='monokai')
+        self.assertNotIn('<style', snippet.highlighted)
+        response = self.client.get(f'/api/snippets/{snippet.pk}/highlight/')
+        self.assertContains(response, '<h2>Demo &lt;1&gt;</h2>')
+        self.assertContains(response, 'href="/api/snippets/styles/monokai.css?v=')
+
+    def test_stylesheet_is_long_cached(self):
+        response = self.client.get('/api/snippets/styles/monokai.css')
+        self.assertEqual(response['Content-Type'], 'text/css; charset=utf-8')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertContains(response, '.highlight .c')
+        response = self.client.get('/api/snippets/styles/no-such-style.css')
+        self.assertEqual(response.status_code, 404)
+
+    def test_compact_legacy_documents(self):
+        snippet = self.create_snippet()
+        fragment = snippet.highlighted
+        legacy = ('<!DOCTYPE html>\n<html>\n<head><style>body .c {}</style></head>\n'
+                  '<body>\n<h2></h2>\n\n' + fragment + '</body>\n</html>\n')
+        Snippet.objects.filter(pk=snippet.pk).update(highlighted=legacy)
+        response = self.client.get(f'/api/snippets/{snippet.pk}/highlight/')
+        self.assertEqual(response.content.decode(), legacy)
+
+        out = StringIO()
+        call_command('compact_highlighted', stdout=out)
+        saved = len(legacy.encode()) - len(fragment.encode())
+        self.assertIn('Compacted 1 snippets', out.getvalue())
+        self.assertIn(f'saved {saved} bytes', out.getvalue())
+        snippet.refresh_from_db()
+        self.assertEqual(snippet.highlighted, fragment)
+
+    def test_compact_rebuilds_page_variants(self):
+        snippet = self.create_snippet()
+        legacy = ('<!DOCTYPE html>\n<html>\n<body>\n<h2></h2>\n\n'
+                  + snippet.highlighted + '</body>\n</html>\n')
+        Snippet.objects.filter(pk=snippet.pk).update(highlighted=legacy,
+                                                      content_hash='')
+        url = f'/api/snippets/{snippet.pk}/highlight/'
+        old_etag = self.client.get(url)['ETag']  # backfills the legacy variants
+
+        call_command('compact_highlighted', stdout=StringIO())
+        plain = self.client.get(url)
+        compressed = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertEqual(compressed['ETag'], plain['ETag'])
+        self.assertNotEqual(plain['ETag'], old_etag)
+
+
+class KeysetPaginationTests(SnippetTestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(25):
+            self.create_snippet(title=f'snippet {i}')
+        # Ties on `created` must be broken by id.
+        tied = ['snippet 3', 'snippet 4', 'snippet 5']
+        created = Snippet.objects.get(title=tied[0]).created
+        Snippet.objects.filter(title__in=tied).update(created=created)
+        self.expected = list(Snippet.objects.order_by('created', 'id')
+                             .values_list('id', flat=True))
+
+    def walk(self, url, direction):
+        seen = []
+        while url:
+            data = self.client.get(url).data
+            ids = [item['id'] for item in data['results']]
+            seen = ids + seen if direction == 'previous' else seen + ids
+            url = data[direction]
+        return seen
+
+    def test_forward_and_backward(self):
+        self.assertEqual(self.walk('/api/snippets/', 'next'), self.expected)
+        last = self.client.get('/api/snippets/?page_size=10').data
+        last = self.client.get(last['next']).data
+        last = self.client.get(last['next']).data
+        self.assertIsNone(last['next'])
+        self.assertEqual(self.walk(last['previous'], 'previous'), self.expected[:20])
+
+    def test_page_without_count_or_offset(self):
+        first = self.client.get('/api/snippets/').data
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(first['next'])
+        sql = ' '.join(query['sql'] for query in queries).upper()
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/snippets/?cursor=bogus')
+        self.assertEqual(response.status_code, 404)
+        for payload in [b'{"v": ["soon", 1]}', b'{"v": {"a": 1, "b": 2}}',
+                        b'{"v": [[1], {}]}', b'{"v": [true, 1]}', b'[1, 2]']:
+            token = base64.urlsafe_b64encode(payload).decode()
+            response = self.client.get(f'/api/snippets/?cursor={token}')
+            self.assertEqual(response.status_code, 404, payload)
+
+
+class SparseFieldsetTests(SnippetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.snippet = self.create_snippet(title='sparse', code='big = "body"\n')
+
+    def test_list_never_loads_code(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/snippets/?fields=title,code')
+        self.assertEqual(list(response.data['results'][0]), ['title'])
+        sql = ' '.join(query['sql'] for query in queries)
+        self.assertNotIn('"code"', sql)
+        self.assertNotIn('"highlighted"', sql)
+
+    def test_list_default_representation(self):
+        item = self.client.get('/api/snippets/').data['results'][0]
+        self.assertNotIn('code', item)
+        self.assertEqual(item['owner'], 'alice')
+        self.assertIn(f'/snippets/{self.snippet.pk}/highlight', item['highlight'])
+
+    def test_detail_fields_and_omit(self):
+        url = f'/api/snippets/{self.snippet.pk}/'
+        data = self.client.get(url + '?fields=id,code').data
+        self.assertEqual(data, {'id': self.snippet.pk, 'code': 'big = "body"\n'})
+        data = self.client.get(url + '?omit=code,style').data
+        self.assertNotIn('code', data)
+        self.assertNotIn('style', data)
+        self.assertIn('language', data)
+
+    def test_fields_ignored_on_writes(self):
+        response = self.client.put(f'/api/snippets/{self.snippet.pk}/?fields=id',
+                                   {'code': 'y = 2'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['code'], 'y = 2')
+
+
+class QueryCountTests(SnippetTestCase):
+    def add_users(self, count, snippets_each=2):
+        for i in range(count):
+            user = User.objects.create_user(f'user{User.objects.count()}')
+            for j in range(snippets_each):
+                Snippet.objects.create(owner=user, code=f'x = {j}\n')
+
+    def test_user_list_is_constant(self):
+        self.add_users(2)
+        # COUNT for the page, the users, and one query for all their snippets.
+        with self.assertNumQueries(3):
+            self.client.get('/api/users/')
+        self.add_users(6)
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/users/')
+        self.assertEqual(len(response.data['results']), 9)
+
+    def test_snippet_list_is_constant(self):
+        self.add_users(2)
+        with self.assertNumQueries(1):
+            self.client.get('/api/snippets/')
+        self.add_users(4)
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/snippets/')
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_owner_check_does_not_load_user(self):
+        snippet = self.create_snippet()
+        snippet = Snippet.objects.get(pk=snippet.pk)
+        other = User.objects.create_user('mallory')
+        permission = IsOwnerOrReadOnly()
+        for user, allowed in [(self.user, True), (other, False)]:
+            request = APIRequestFactory().delete('/')
+            request.user = user
+            with self.assertNumQueries(0):
+                self.assertIs(
+                    permission.has_object_permission(request, None, snippet), allowed
+                )
+        self.client.force_authenticate(other)
+        response = self.client.delete(f'/api/snippets/{snippet.pk}/')
+        self.assertEqual(response.status_code, 403)
+
+
+class ConditionalHighlightTests(SnippetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.snippet = self.create_snippet(title='cond')
+        self.url = f'/api/snippets/{self.snippet.pk}/highlight/'
+
+    def test_etag_and_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response['ETag'], f'"{self.snippet.content_hash}"')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        since = self.client.get(self.url)['Last-Modified']
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_follows_page_content(self):
+        etag = self.client.get(self.url)['ETag']
+        self.snippet.title = 'renamed'
+        self.snippet.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '<h2>renamed</h2>')
+
+    def test_precompressed_gzip(self):
+        plain = self.client.get(self.url).content
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain)
+
+    def test_refused_encodings_are_not_served(self):
+        for header in ['gzip;q=0', 'gzip; q=0.0, identity', '*;q=0, identity']:
+            response = self.client.get(self.url, HTTP_ACCEPT_ENCODING=header)
+            self.assertNotIn('Content-Encoding', response, header)
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='br;q=0, *')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_accept_encoding_qualities(self):
+        accepted = accepted_encodings('br;q=0, GZIP;q=0.5, deflate;q=x')
+        self.assertEqual(accepted, {'br': 0.0, 'gzip': 0.5})
+        self.assertFalse(accepts_encoding(accepted, 'br'))
+        self.assertTrue(accepts_encoding(accepted, 'gzip'))
+        self.assertFalse(accepts_encoding(accepted, 'deflate'))
+
+    @skipUnless(highlighting.brotli, 'brotli is not installed')
+    def test_precompressed_brotli(self):
+        plain = self.client.get(self.url).content
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(highlighting.brotli.decompress(response.content), plain)
+
+    def test_rows_without_variants_are_backfilled(self):
+        Snippet.objects.filter(pk=self.snippet.pk).update(
+            content_hash='', highlighted_gzip=None
+        )
+        response = self.client.get(self.url)
+        self.snippet.refresh_from_db()
+        self.assertEqual(response['ETag'], f'"{self.snippet.content_hash}"')
+        self.assertIsNotNone(self.snippet.highlighted_gzip)
+
+
+class BulkEndpointTests(SnippetTestCase):
+    url = '/api/snippets/bulk/'
+
+    def test_bulk_create(self):
+        items = [{'title': f'bulk {i}', 'code': f'x = {i}\n'} for i in range(5)]
+        with self.assertNumQueries(3):  # savepoint, INSERT, release
+            response = self.client.post(self.url, items, format='json')
+        self.assertEqual(response.status_code, 201)
+        results = response.data['results']
+        self.assertEqual([result['index'] for result in results], list(range(5)))
+        snippets = Snippet.objects.filter(pk__in=[result['id'] for result in results])
+        self.assertEqual(snippets.count(), 5)
+        self.assertTrue(all(snippet.is_highlighted for snippet in snippets))
+
+    def test_per_item_errors(self):
+        mine = self.create_snippet(title='mine')
+        theirs = Snippet.objects.create(owner=User.objects.create_user('bob'), code='y')
+        items = [
+            {'code': 'ok = 1'},
+            {'code': 'bad', 'language': 'no-such-language'},
+            'not a snippet',
+            {'id': mine.pk, 'title': 'renamed'},
+            {'id': theirs.pk, 'title': 'stolen'},
+            {'id': 0, 'title': 'missing'},
+        ]
+        response = self.client.post(self.url, items, format='json')
+        self.assertEqual(response.status_code, 207)
+        statuses = [result['status'] for result in response.data['results']]
+        self.assertEqual(statuses,
+                         ['created', 'error', 'error', 'updated', 'error', 'error'])
+        self.assertIn('language', response.data['results'][1]['errors'])
+        mine.refresh_from_db()
+        theirs.refresh_from_db()
+        self.assertEqual(mine.title, 'renamed')
+        self.assertEqual(theirs.title, '')
+
+    def test_invalid_ids(self):
+        mine = self.create_snippet(title='mine')
+        items = [{'id': [mine.pk]}, {'id': {'a': 1}}, {'id': True}, {'id': str(mine.pk)}]
+        response = self.client.post(self.url, items, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([result['errors'] for result in response.data['results']],
+                         [{'id': ['Invalid id.']}] * 4)
+
+    def test_rejects_non_list_and_all_failures(self):
+        response = self.client.post(self.url, {'code': 'x'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(self.url, [{'language': 'python'}], format='json')
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(SNIPPETS_HIGHLIGHT_WORKERS=2)
+    def test_highlighting_fans_out_to_workers(self):
+        items = [{'code': f'z = {i}\n'} for i in range(3)]
+        executor = ImmediateExecutor()
+        with mock.patch('snippets.highlighting.get_executor', return_value=executor):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(self.url, items, format='json')
+        self.assertEqual({r['highlight_status'] for r in response.data['results']},
+                         {'pending'})
+        self.assertEqual(Snippet.objects.filter(highlight_status='ready').count(), 3)
+
+
+class SearchTests(SnippetTestCase):
+    url = '/api/snippets/search/'
+
+    def setUp(self):
+        super().setUp()
+        self.parser = self.create_snippet(
+            title='argument parser',
+            code='import argparse\nparser = argparse.ArgumentParser()\n',
+        )
+        self.mention = self.create_snippet(
+            title='misc', code='x = 1\n# see the argument docs\ny = 2\n'
+        )
+        self.query = self.create_snippet(
+            title='query', code='SELECT argument FROM t;\n', language='sql'
+        )
+
+    def search(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_ranked_with_matching_lines(self):
+        results = self.search(q='argument')
+        self.assertEqual(results[0]['id'], self.parser.pk)
+        self.assertEqual({r['id'] for r in results},
+                         {self.parser.pk, self.mention.pk, self.query.pk})
+        mention = next(r for r in results if r['id'] == self.mention.pk)
+        self.assertEqual(mention['lines'],
+                         [{'line': 2, 'text': '# see the argument docs'}])
+
+    def test_language_filter_and_prefix(self):
+        results = self.search(q='argu', language='sql')
+        self.assertEqual([r['id'] for r in results], [self.query.pk])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.mention.code = 'nothing here\n'
+        self.mention.save()
+        self.query.delete()
+        self.assertEqual([r['id'] for r in self.search(q='argument')], [self.parser.pk])
+
+    def test_user_input_is_not_fts_syntax(self):
+        self.assertEqual(self.search(q='"unbalanced AND ('), [])
+        self.assertEqual(self.search(q=''), [])
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO snippets_snippet_fts(snippets_snippet_fts) "
+                           "VALUES ('delete-all')")
+        self.assertEqual(self.search(q='argument'), [])
+        call_command('rebuild_search_index', optimize=True, stdout=StringIO())
+        self.assertEqual(len(self.search(q='argument')), 3)
+
+
+class DirtyFieldTests(SnippetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.snippet = Snippet.objects.get(pk=self.create_snippet(title='dirty').pk)
+
+    def update_sql(self, save):
+        with CaptureQueriesContext(connection) as queries:
+            save()
+        return [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+
+    def test_owner_change_skips_highlighting(self):
+        self.snippet.owner = User.objects.create_user('bob')
+        with mock.patch('snippets.models.page_variants') as variants, \
+                mock.patch('snippets.highlighting.render_html') as render:
+            [sql] = self.update_sql(self.snippet.save)
+        variants.assert_not_called()
+        render.assert_not_called()
+        self.assertIn('"owner_id"', sql)
+        self.assertNotIn('"highlighted"', sql)
+        self.assertNotIn('"code"', sql)
+
+    def test_unchanged_save_writes_nothing(self):
+        with self.assertNumQueries(0):
+            self.snippet.save()
+            self.snippet.save(update_fields=['title'])
+
+    def test_title_change_only_rebuilds_page(self):
+        old_hash = self.snippet.content_hash
+        self.snippet.title = 'renamed'
+        with mock.patch('snippets.highlighting.render_html') as render:
+            [sql] = self.update_sql(self.snippet.save)
+        render.assert_not_called()
+        self.assertIn('"content_hash"', sql)
+        self.assertNotIn('"highlighted" =', sql)
+        self.assertNotEqual(self.snippet.content_hash, old_hash)
+
+    def test_code_change_rehighlights(self):
+        self.snippet.code = 'changed = True\n'
+        [sql] = self.update_sql(self.snippet.save)
+        self.assertIn('"highlighted"', sql)
+        self.assertIn('changed', Snippet.objects.get(pk=self.snippet.pk).highlighted)
+
+    def test_update_fields_limit_the_change(self):
+        self.snippet.code = 'not saved\n'
+        self.snippet.title = 'saved'
+        self.snippet.save(update_fields=['title'])
+        self.snippet.refresh_from_db()
+        self.assertEqual(self.snippet.title, 'saved')
+        self.assertEqual(self.snippet.code, 'print("hello")\n')
+
+    def test_change_survives_loading_a_deferred_field(self):
+        snippet = Snippet.objects.only('id', 'title').get(pk=self.snippet.pk)
+        snippet.title = 'changed'
+        snippet.code  # loads the deferred column
+        snippet.save()
+        self.assertEqual(Snippet.objects.get(pk=snippet.pk).title, 'changed')
+
+    def test_assigning_a_deferred_field_is_saved(self):
+        snippet = Snippet.objects.only('id').get(pk=self.snippet.pk)
+        snippet.code = 'print(2)\n'
+        snippet.save()
+        saved = Snippet.objects.get(pk=snippet.pk)
+        self.assertEqual(saved.code, 'print(2)\n')
+        self.assertIn('print', saved.highlighted)
+
+    def test_deferred_save_without_changes_still_writes(self):
+        snippet = Snippet.objects.defer('code').get(pk=self.snippet.pk)
+        self.assertEqual(len(self.update_sql(snippet.save)), 1)
+
+    def test_partial_refresh_keeps_pending_changes(self):
+        self.snippet.title = 'pending'
+        self.snippet.refresh_from_db(fields=['code'])
+        self.snippet.save()
+        self.assertEqual(Snippet.objects.get(pk=self.snippet.pk).title, 'pending')
+
+    @override_settings(SNIPPETS_HIGHLIGHT_WORKERS=2)
+    def test_pending_snippet_is_requeued_on_title_change(self):
+        Snippet.objects.filter(pk=self.snippet.pk).update(highlight_status='pending')
+        self.snippet.refresh_from_db()
+        self.snippet.title = 'renamed'
+        with mock.patch('snippets.models.schedule_highlight') as schedule:
+            self.snippet.save()
+        schedule.assert_called_once_with(self.snippet.pk)
+
+
+class CompiledSerializerTests(SnippetTestCase):
+    def setUp(self):
+        super().setUp()
+        other = User.objects.create_user('bob')
+        for i in range(12):
+            self.create_snippet(title=f'compiled {i}', linenos=bool(i % 2),
+                                owner=other if i % 3 else self.user)
+
+    def create_snippet(self, **fields):
+        fields.setdefault('code', 'print("hello")\n')
+        fields.setdefault('owner', self.user)
+        return Snippet.objects.create(**fields)
+
+    def assertMatchesStock(self, viewset, url):
+        compiled = self.client.get(url)
+        with mock.patch.object(viewset, 'list', viewsets.ModelViewSet.list):
+            stock = self.client.get(url)
+        self.assertEqual(compiled.status_code, 200)
+        self.assertEqual(compiled.content, stock.content)
+
+    def test_snippet_list_matches_stock(self):
+        self.assertMatchesStock(SnippetViewSet, '/api/snippets/')
+        self.assertMatchesStock(SnippetViewSet, '/api/snippets/?format=json')
+        self.assertMatchesStock(SnippetViewSet, '/api/snippets/?fields=url,owner')
+        cursor = self.client.get('/api/snippets/').data['next']
+        self.assertMatchesStock(SnippetViewSet, cursor)
+
+    def test_user_serializer_matches_stock(self):
+        request = Request(APIRequestFactory().get('/api/users/'))
+        context = {'request': request}
+        queryset = UserViewSet.queryset.order_by('pk')
+        stock = UserSerializer(queryset, many=True, context=context).data
+        compiled = CompiledSerializer(UserSerializer(context=context))
+        self.assertEqual(compiled.serialize(compiled.select(queryset)),
+                         [dict(item) for item in stock])
+
+    def test_unsupported_field_is_rejected(self):
+        class MethodSerializer(SnippetSerializer):
+            shout = serializers.SerializerMethodField()
+
+            class Meta(SnippetSerializer.Meta):
+                fields = ['id', 'shout']
+
+            def get_shout(self, snippet):
+                return snippet.title.upper()
+
+        request = Request(APIRequestFactory().get('/api/snippets/'))
+        with self.assertRaises(ImproperlyConfigured):
+            CompiledSerializer(MethodSerializer(context={'request': request}))
@@ -1,28 +1,185 @@
-from rest_framework import permissions, renderers, viewsets
+from rest_framework import permissions, renderers, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from django.contrib.auth.models import User
+from django.db.models import Prefetch
+from django.http import Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers, quote_etag
+from django.utils.html import escape
+from django.utils.http import http_date
+from pygments.util import ClassNotFound
+from snippets import bulk, highlighting, search
+from snippets.compiled import CompiledListMixin
 from snippets.models import Snippet
+from snippets.pagination import KeysetPagination
+from snippets.renderers import StylesheetRenderer
 from snippets.serializers import SnippetSerializer, UserSerializer
 from snippets.permissions import IsOwnerOrReadOnly
 
 
-class SnippetViewSet(viewsets.ModelViewSet):
+def accepted_encodings(header):
+    """
+    Parse an Accept-Encoding header into {coding: quality}, lowercased.
+    Codings with a malformed quality are left out.
+    """
+    encodings = {}
+    for item in header.split(','):
+        coding, *params = [part.strip() for part in item.split(';')]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = None
+        if quality is not None:
+            encodings[coding.lower()] = quality
+    return encodings
+
+
+def accepts_encoding(encodings, coding):
+    """Whether `coding` is acceptable, given the result of `accepted_encodings`."""
+    return encodings.get(coding, encodings.get('*', 0)) > 0
+
+
+class SnippetViewSet(CompiledListMixin, viewsets.ModelViewSet):
     """
     This viewset automatically provides `list`, `create`, `retrieve`,
     `update` and `destroy` actions.
 
-    Additionally we also provide an extra `highlight` action.
+    Additionally we also provide an extra `highlight` action, and a
+    `stylesheet` action serving the CSS shared by all snippets of a style.
+
+    The `list` action uses the compiled serializer (see `snippets.compiled`):
+    it is the largest public list, and its fields are plain columns and
+    primary-key hyperlinks, so the output is identical.
     """
     queryset = Snippet.objects.all()
     serializer_class = SnippetSerializer
+    pagination_class = KeysetPagination
     permission_classes = [permissions.IsAuthenticatedOrReadOnly,
                           IsOwnerOrReadOnly]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            # Only read the columns of the fields being rendered.
+            queryset = self.get_serializer().narrow_queryset(queryset)
+        return queryset
+
     @action(detail=True, renderer_classes=[renderers.StaticHTMLRenderer])
     def highlight(self, request, *args, **kwargs):
         snippet = self.get_object()
-        return Response(snippet.highlighted)
+        if not snippet.is_highlighted:
+            html = highlighting.cached_html(snippet.code, snippet.language,
+                                            snippet.linenos)
+            if html is not None:
+                page = highlighting.build_page(html, snippet.title, snippet.style)
+                return Response(page)
+            # Until the worker has rendered the HTML, serve the plain code.
+            fallback = '<!DOCTYPE html>\n<html><body><pre>%s</pre></body></html>\n'
+            return Response(
+                fallback % escape(snippet.code),
+                headers={'Cache-Control': 'no-store',
+                         'X-Highlight-Status': snippet.highlight_status},
+            )
+
+        if not snippet.content_hash:
+            snippet.backfill_page_variants()
+        etag = quote_etag(snippet.content_hash)
+        last_modified = int(snippet.modified.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = self.encoded_page(request, snippet)
+        response.headers['ETag'] = etag
+        response.headers['Last-Modified'] = http_date(last_modified)
+        # Let readers keep a copy but check back before reusing it.
+        response.headers['Cache-Control'] = 'public, no-cache'
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
+
+    @staticmethod
+    def encoded_page(request, snippet):
+        """Serve the stored encoding of the page the client accepts best."""
+        accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if snippet.highlighted_br and accepts_encoding(accepted, 'br'):
+            body, encoding = bytes(snippet.highlighted_br), 'br'
+        elif snippet.highlighted_gzip and accepts_encoding(accepted, 'gzip'):
+            body, encoding = bytes(snippet.highlighted_gzip), 'gzip'
+        else:
+            page = highlighting.build_page(snippet.highlighted, snippet.title,
+                                           snippet.style)
+            body, encoding = page.encode(), None
+        response = HttpResponse(body, content_type='text/html; charset=utf-8')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        return response
+
+    @action(detail=False, url_path=r'styles/(?P<style>[\w-]+)',
+            renderer_classes=[StylesheetRenderer])
+    def stylesheet(self, request, style, *args, **kwargs):
+        try:
+            css = highlighting.stylesheet(style)
+        except ClassNotFound:
+            raise Http404
+        # Page links carry a digest of the CSS, so the response never changes.
+        return Response(css, headers={
+            'Cache-Control': 'public, max-age=31536000, immutable'
+        })
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request, *args, **kwargs):
+        """
+        Create or update a list of snippets; items with an `id` are updates.
+
+        Responds with one result per item: 201 if all were saved, 207 if
+        only some were and 400 if none were.
+        """
+        items = request.data
+        limit = bulk.max_items()
+        if not isinstance(items, list) or len(items) > limit:
+            return Response(
+                {'detail': f'Expected a list of at most {limit} snippets.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        results = bulk.bulk_save(items, request.user, self.get_serializer_context())
+        failed = sum(result['status'] == 'error' for result in results)
+        if not failed:
+            code = status.HTTP_201_CREATED
+        elif failed < len(results):
+            code = status.HTTP_207_MULTI_STATUS
+        else:
+            code = status.HTTP_400_BAD_REQUEST
+        return Response({'results': results}, status=code)
+
+    @action(detail=False, url_path='search')
+    def search(self, request, *args, **kwargs):
+        """
+        Ranked full-text search over titles and code: `?q=words`, optionally
+        `&language=python` and `&limit=` (at most 100).
+        """
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+        except ValueError:
+            limit = 20
+        try:
+            matches = search.search(request.query_params.get('q', ''),
+                                    language=request.query_params.get('language'),
+                                    limit=limit)
+        except search.SearchUnavailable as exc:
+            return Response({'detail': str(exc)},
+                            status=status.HTTP_501_NOT_IMPLEMENTED)
+        for match in matches:
+            match['url'] = reverse('snippet-detail', args=[match['id']], request=request)
+            match['lines'] = [{'line': number, 'text': text}
+                              for number, text in match['lines']]
+        return Response({'results': matches})
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
@@ -32,5 +189,8 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
     """
     This viewset automatically provides `list` and `retrieve` actions.
     """
-    queryset = User.objects.all()
+    # The `snippets` hyperlinks only need each snippet's id.
+    queryset = User.objects.order_by('pk').prefetch_related(
+        Prefetch('snippets', queryset=Snippet.objects.only('id', 'owner_id'))
+    )
     serializer_class = UserSerializer
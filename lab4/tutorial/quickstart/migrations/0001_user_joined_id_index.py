@@ -0,0 +1,23 @@
+from django.db import migrations, models
+
+# UserPagination seeks on (-date_joined, -id); the index is read backwards.
+INDEX = models.Index(fields=['date_joined', 'id'], name='quickstart_user_joined_id_idx')
+
+
+def add_index(apps, schema_editor):
+    schema_editor.add_index(apps.get_model('auth', 'User'), INDEX)
+
+
+def remove_index(apps, schema_editor):
+    schema_editor.remove_index(apps.get_model('auth', 'User'), INDEX)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_index, remove_index),
+    ]
@@ -0,0 +1,67 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from rest_framework.response import Response
+
+from snippets.pagination import KeysetPagination
+
+
+def estimate_row_count(model, using='default'):
+    """Return the planner's row estimate for the model's table, or None."""
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+                           [table])
+        elif connection.vendor == 'mysql':
+            cursor.execute('SELECT table_rows FROM information_schema.tables '
+                           'WHERE table_schema = DATABASE() AND table_name = %s',
+                           [table])
+        else:
+            return None
+        row = cursor.fetchone()
+    return row[0] if row and row[0] is not None and row[0] >= 0 else None
+
+
+class CountedKeysetPagination(KeysetPagination):
+    """
+    Keyset pagination that also reports an approximate `count`.
+
+    For a whole table the database's own estimate is used where there is
+    one; otherwise the exact COUNT(*) is cached for
+    `QUICKSTART_COUNT_CACHE_TIMEOUT` seconds, so it runs at most once per
+    timeout rather than on every page.
+    """
+    def paginate_queryset(self, queryset, request, view=None):
+        self.queryset = queryset
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_count(self, queryset):
+        if not queryset.query.where:
+            estimate = estimate_row_count(queryset.model, queryset.db)
+            if estimate is not None:
+                return estimate
+        sql = str(queryset.query).encode()
+        key = 'quickstart:count:' + hashlib.sha256(sql).hexdigest()
+        timeout = getattr(settings, 'QUICKSTART_COUNT_CACHE_TIMEOUT', 60)
+        return cache.get_or_set(key, queryset.count, timeout)
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        return Response({'count': self.get_count(self.queryset), **response.data})
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count'] = {'type': 'integer'}
+        return response_schema
+
+
+class UserPagination(CountedKeysetPagination):
+    ordering = ('-date_joined', '-id')
+
+
+class GroupPagination(CountedKeysetPagination):
+    ordering = ('name', 'id')
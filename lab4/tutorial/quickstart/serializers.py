@@ -1,14 +1,45 @@
+from django.conf import settings
 from django.contrib.auth.models import Group, User
 from rest_framework import serializers
 
 
-class UserSerializer(serializers.HyperlinkedModelSerializer):
+class MissingPrefetch(AssertionError):
+    pass
+
+
+class PrefetchCheckMixin:
+    """
+    Fail loudly when a list response reads a to-many relation that the view
+    didn't prefetch, since that costs one query per row.
+
+    Only active when ``QUICKSTART_CHECK_PREFETCHES`` is set (development and
+    the test suite), and only for instances serialized as part of a list.
+    """
+    def to_representation(self, instance):
+        if (getattr(settings, 'QUICKSTART_CHECK_PREFETCHES', False)
+                and isinstance(self.parent, serializers.ListSerializer)):
+            self.check_prefetched(instance)
+        return super().to_representation(instance)
+
+    def check_prefetched(self, instance):
+        prefetched = getattr(instance, '_prefetched_objects_cache', {})
+        for field in self._readable_fields:
+            if isinstance(field, serializers.ManyRelatedField):
+                if field.source not in prefetched:
+                    raise MissingPrefetch(
+                        f'{type(self).__name__}.{field.field_name} reads '
+                        f'{type(instance).__name__}.{field.source} without '
+                        f'prefetch_related().'
+                    )
+
+
+class UserSerializer(PrefetchCheckMixin, serializers.HyperlinkedModelSerializer):
     class Meta:
         model = User
         fields = ['url', 'username', 'email', 'groups']
 
 
-class GroupSerializer(serializers.HyperlinkedModelSerializer):
+class GroupSerializer(PrefetchCheckMixin, serializers.HyperlinkedModelSerializer):
     class Meta:
         model = Group
-        fields = ['url', 'name']
\ No newline at end of file
+        fields = ['url', 'name']
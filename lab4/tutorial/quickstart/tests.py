@@ -1,3 +1,148 @@
-from django.test import TestCase
+import base64
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from snippets.compiled import CompiledSerializer
+from tutorial.quickstart.pagination import GroupPagination, UserPagination
+from tutorial.quickstart.serializers import MissingPrefetch, UserSerializer
+from tutorial.quickstart.views import GroupViewSet, UserViewSet
+
+
+class QuickstartTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user('admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def walk(self, url):
+        names, counts = [], set()
+        while url:
+            data = self.client.get(url).data
+            counts.add(data['count'])
+            names += [item['username'] for item in data['results']]
+            url = data['next']
+        return names, counts
+
+
+class KeysetPaginationTests(QuickstartTestCase):
+    def test_users_newest_first_across_pages(self):
+        for i in range(24):
+            User.objects.create_user(f'user{i}')
+        # Same date_joined for several users: ties are broken by id.
+        User.objects.filter(username__in=['user1', 'user2', 'user3']).update(
+            date_joined=User.objects.get(username='user1').date_joined
+        )
+        names, counts = self.walk('/users/')
+        expected = User.objects.order_by('-date_joined', '-id')
+        self.assertEqual(names, list(expected.values_list('username', flat=True)))
+        self.assertEqual(counts, {25})
+
+    def test_groups_by_name(self):
+        for name in ['b', 'a', 'c']:
+            Group.objects.create(name=name)
+        data = self.client.get('/groups/?page_size=2').data
+        self.assertEqual([group['name'] for group in data['results']], ['a', 'b'])
+        data = self.client.get(data['next']).data
+        self.assertEqual([group['name'] for group in data['results']], ['c'])
+        self.assertIsNone(data['next'])
+
+    def test_count_is_cached(self):
+        self.client.get('/users/')
+        User.objects.create_user('late')
+        with CaptureQueriesContext(connection) as queries:
+            data = self.client.get('/users/').data
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries))
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(len(data['results']), 2)
+
+    @skipUnless(connection.vendor == 'sqlite', 'checks an SQLite query plan')
+    def test_seek_uses_an_index(self):
+        cases = [
+            (User, UserPagination, '2026-01-01T00:00:00+00:00',
+             'quickstart_user_joined_id_idx'),
+            (Group, GroupPagination, 'a', 'auth_group'),
+        ]
+        for model, pagination, first, index in cases:
+            ordering = list(pagination.ordering)
+            queryset = (model.objects.order_by(*ordering)
+                        .filter(pagination.seek_filter(ordering, [first, 5]))[:11])
+            plan = queryset.explain()
+            self.assertIn(index, plan)
+            self.assertIn('USING', plan)
+            self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_malformed_cursor(self):
+        for payload in [b'{"v": {"a": 1, "b": 2}}', b'{"v": [null, 1]}', b'"v"']:
+            token = base64.urlsafe_b64encode(payload).decode()
+            for url in ['/users/', '/groups/']:
+                response = self.client.get(f'{url}?cursor={token}')
+                self.assertEqual(response.status_code, 404, (url, payload))
+
+
+@override_settings(QUICKSTART_CHECK_PREFETCHES=True)
+class PrefetchTests(QuickstartTestCase):
+    def setUp(self):
+        super().setUp()
+        groups = [Group.objects.create(name=f'group{i}') for i in range(3)]
+        for i in range(30):
+            User.objects.create_user(f'user{i}').groups.set(groups[:i % 4])
+
+    def assertConstantQueries(self, url, queries):
+        for page_size in [2, 20]:
+            page_url = f'{url}?page_size={page_size}'
+            self.client.get(page_url)  # warm the cached count
+            with self.assertNumQueries(queries):
+                data = self.client.get(page_url).data
+            self.assertEqual(len(data['results']), page_size)
+
+    def test_users_list_query_count(self):
+        # The page and the groups prefetch.
+        self.assertConstantQueries('/users/', 2)
+
+    def test_groups_list_query_count(self):
+        for i in range(3, 25):
+            Group.objects.create(name=f'group{i}')
+        self.assertConstantQueries('/groups/', 1)
+
+    def test_groups_are_rendered(self):
+        data = self.client.get('/users/?page_size=30').data
+        groups = {user['username']: len(user['groups']) for user in data['results']}
+        self.assertEqual(groups['user3'], 3)
+        self.assertEqual(groups['user4'], 0)
+
+    def test_missing_prefetch_raises(self):
+        request = APIRequestFactory().get('/users/')
+        serializer = UserSerializer(User.objects.all(), many=True,
+                                    context={'request': request})
+        with self.assertRaises(MissingPrefetch):
+            serializer.data
+
+    def test_list_endpoint_is_checked(self):
+        with mock.patch.object(UserViewSet, 'queryset', User.objects.all()):
+            with self.assertRaises(MissingPrefetch):
+                self.client.get('/users/')
+
+    def test_single_instance_is_not_checked(self):
+        request = APIRequestFactory().get('/users/')
+        user = User.objects.get(username='user3')
+        data = UserSerializer(user, context={'request': request}).data
+        self.assertEqual(len(data['groups']), 3)
+
+    def test_compiled_serializers_match_stock(self):
+        request = Request(APIRequestFactory().get('/users/'))
+        context = {'request': request}
+        for viewset in [UserViewSet, GroupViewSet]:
+            serializer_class = viewset.serializer_class
+            queryset = viewset.queryset.order_by('pk')
+            stock = serializer_class(queryset, many=True, context=context).data
+            compiled = CompiledSerializer(serializer_class(context=context))
+            self.assertEqual(compiled.serialize(compiled.select(queryset)),
+                             [dict(item) for item in stock])
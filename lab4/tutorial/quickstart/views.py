@@ -1,6 +1,8 @@
 from django.contrib.auth.models import Group, User
+from django.db.models import Prefetch
 from rest_framework import permissions, viewsets
 
+from tutorial.quickstart.pagination import GroupPagination, UserPagination
 from tutorial.quickstart.serializers import GroupSerializer, UserSerializer
 
 
@@ -8,8 +10,12 @@ class UserViewSet(viewsets.ModelViewSet):
     """
     API endpoint that allows users to be viewed or edited.
     """
-    queryset = User.objects.all().order_by('-date_joined')
+    # Group hyperlinks only need the primary key.
+    queryset = User.objects.prefetch_related(
+        Prefetch('groups', queryset=Group.objects.only('id'))
+    ).order_by('-date_joined')
     serializer_class = UserSerializer
+    pagination_class = UserPagination
     permission_classes = [permissions.IsAuthenticated]
 
 
@@ -19,4 +25,5 @@ class GroupViewSet(viewsets.ModelViewSet):
     """
     queryset = Group.objects.all().order_by('name')
     serializer_class = GroupSerializer
+    pagination_class = GroupPagination
     permission_classes = [permissions.IsAuthenticated]
@@ -39,6 +39,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'snippets',
+    'tutorial.quickstart',
 ]
 
 MIDDLEWARE = [
@@ -128,3 +129,19 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10
 }
+
+# Threads rendering snippet highlighting in the background (0 renders inline)
+SNIPPETS_HIGHLIGHT_WORKERS = 2
+
+# Upper bound, in bytes, of the in-process cache of rendered snippet HTML
+SNIPPETS_HIGHLIGHT_CACHE_BYTES = 16 * 1024 * 1024
+
+# Limits of the bulk snippet endpoint (POST /api/snippets/bulk/)
+SNIPPETS_BULK_MAX_ITEMS = 1000
+SNIPPETS_BULK_BATCH_SIZE = 500
+
+# Seconds the quickstart list endpoints reuse an exact row count
+QUICKSTART_COUNT_CACHE_TIMEOUT = 60
+
+# Raise when a quickstart list response reads a relation that wasn't prefetched
+QUICKSTART_CHECK_PREFETCHES = DEBUG